@@ -8,17 +8,239 @@
 #############################################################################################
 
 
+from bisect import bisect_left, bisect_right
+from collections import Counter
 from itertools import combinations
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from functools import reduce
+from heapq import nlargest, nsmallest
 from operator import mul
 import os
 
 
-def get_numbers_totalling_N(numbers: List[int], total_N: int, n_numbers: int) -> Tuple[int]:
+def _first_k_sum(numbers: List[int], positions: Dict[int, List[int]], start: int,
+                 total_N: int, n_numbers: int) -> Optional[List[int]]:
+    '''
+    Find the first combination of list positions, in the order generated by
+    itertools.combinations, whose entries sum to the total. Each leading position is
+    fixed in turn and the remainder searched for over later positions, down to a
+    single value found by bisecting its sorted positions.
+
+
+    Arguments
+    ---------
+
+    numbers     list of numbers to search
+    positions   dictionary with each value as a key and its positions within the
+                list in ascending order as the value
+    start       first position of the list to consider
+    total_N     total to be met by summing subset
+    n_numbers   size of the subset
+
+
+    Returns
+    -------
+
+    List of positions in ascending order, or None if no subset exists
+
+    '''
+    if n_numbers == 1:
+        _candidates = positions.get(total_N, [])
+        _next = bisect_left(_candidates, start)
+        return [_candidates[_next]] if _next < len(_candidates) else None
+
+    # A repeated lead value searches a subset of the suffix already searched
+    _failed: Set[int] = set()
+
+    for i in range(start, len(numbers) - n_numbers + 1):
+        if numbers[i] in _failed:
+            continue
+        _rest = _first_k_sum(numbers, positions, i+1, total_N - numbers[i], n_numbers - 1)
+        if _rest is not None:
+            return [i] + _rest
+        _failed.add(numbers[i])
+
+    return None
+
+
+def _k_sum_sorted(values: List[int], start: int, total_N: int, n_numbers: int) -> Optional[List[int]]:
+    '''
+    Find positions within a sorted list of values whose entries sum to the total,
+    using two pointers for pairs and recursive reduction for larger subsets
+
+
+    Arguments
+    ---------
+
+    values      list of numbers sorted in ascending order
+    start       first position of the list to consider
+    total_N     total to be met by summing subset
+    n_numbers   size of the subset
+
+
+    Returns
+    -------
+
+    List of positions within the sorted list, or None if no subset exists
+
+    '''
+    if len(values) - start < n_numbers:
+        return None
+
+    # Prune whenever the total lies outside the smallest/largest achievable sums
+    if sum(values[start:start+n_numbers]) > total_N or sum(values[-n_numbers:]) < total_N:
+        return None
+
+    if n_numbers == 2:
+        _lo, _hi = start, len(values) - 1
+        while _lo < _hi:
+            _sum = values[_lo] + values[_hi]
+            if _sum == total_N:
+                return [_lo, _hi]
+            elif _sum < total_N:
+                _lo += 1
+            else:
+                _hi -= 1
+        return None
+
+    for i in range(start, len(values) - n_numbers + 1):
+        if i > start and values[i] == values[i-1]:
+            continue
+        _rest = _k_sum_sorted(values, i+1, total_N - values[i], n_numbers - 1)
+        if _rest is not None:
+            return [i] + _rest
+
+    return None
+
+
+class SubsetSumIndex:
+    '''
+    Index built once from a list of numbers so that repeated subset sum queries
+    against many totals share the sorting and hashing work
+
+
+    Arguments
+    ---------
+
+    numbers     list of numbers to index
+
+    Optional Arguments
+    ------------------
+
+    pair_sums   also build a hash map from every pairwise sum to a pair of
+                indices, trading O(n^2) memory for O(1) pair and O(n) triple
+                lookups
+
+    '''
+    def __init__(self, numbers: List[int], pair_sums: bool = False) -> None:
+        self.numbers = list(numbers)
+        self._order = sorted(range(len(self.numbers)), key=lambda i: self.numbers[i])
+        self.sorted_values = [self.numbers[i] for i in self._order]
+        self.value_counts = Counter(self.numbers)
+        self.pair_sums: Optional[Dict[int, Tuple[int, int]]] = None
+
+        if pair_sums:
+            # Keep the pair with the lowest second index for each sum so a
+            # third number at any later index is guaranteed to be disjoint
+            self.pair_sums = {}
+            for j, b in enumerate(self.numbers):
+                for i in range(j):
+                    self.pair_sums.setdefault(self.numbers[i] + b, (i, j))
+
+    def _as_subset(self, indices: List[int]) -> Tuple[int, ...]:
+        return tuple(self.numbers[i] for i in sorted(indices))
+
+    def _find_indices(self, total_N: int, n_numbers: int) -> Optional[List[int]]:
+        if n_numbers < 1:
+            return [] if total_N == 0 else None
+
+        if n_numbers == 1:
+            if self.value_counts[total_N]:
+                return [self.numbers.index(total_N)]
+            return None
+
+        if self.pair_sums is not None:
+            if n_numbers == 2:
+                _pair = self.pair_sums.get(total_N)
+                return list(_pair) if _pair else None
+            if n_numbers == 3:
+                for k, c in enumerate(self.numbers):
+                    _pair = self.pair_sums.get(total_N - c)
+                    if _pair and _pair[1] < k:
+                        return [_pair[0], _pair[1], k]
+                return None
+
+        _positions = _k_sum_sorted(self.sorted_values, 0, total_N, n_numbers)
+
+        if _positions is None:
+            return None
+
+        return [self._order[p] for p in _positions]
+
+    def find(self, total_N: int, n_numbers: int) -> Tuple[int, ...]:
+        '''
+        Find the subset of indexed numbers which sum to the given total
+
+
+        Arguments
+        ---------
+
+        total_N     total to be met by summing subset
+        n_numbers   size of the subset
+
+
+        Returns
+        -------
+
+        A tuple containing the subset of integers which sum to the total, in
+        the order they appear within the indexed list
+
+        '''
+        _indices = self._find_indices(total_N, n_numbers)
+
+        if _indices is None:
+            raise ValueError(f"Could not find subset which summates to {total_N}")
+
+        return self._as_subset(_indices)
+
+    def find_many(self, totals: Iterable[int], n_numbers: int) -> Dict[int, Optional[Tuple[int, ...]]]:
+        '''
+        Find a subset of indexed numbers for each of the given totals
+
+
+        Arguments
+        ---------
+
+        totals      totals to be met by summing subsets
+        n_numbers   size of each subset
+
+
+        Returns
+        -------
+
+        Dictionary with each total as a key and the matching subset as the
+        value, or None where no subset summates to that total
+
+        '''
+        _results: Dict[int, Optional[Tuple[int, ...]]] = {}
+
+        for total in totals:
+            if total in _results:
+                continue
+            _indices = self._find_indices(total, n_numbers)
+            _results[total] = None if _indices is None else self._as_subset(_indices)
+
+        return _results
+
+
+def get_numbers_totalling_N(numbers: List[int], total_N: int, n_numbers: int) -> Tuple[int, ...]:
     '''
     Find the subset of numbers in a list which sum to the given total
 
+    Positions of each value are hashed once so that the final number of every
+    candidate combination is found by bisection rather than by summing tuples,
+    giving the same subset as a brute force search over combinations.
+
 
     Arguments
     ---------
@@ -31,15 +253,232 @@ def get_numbers_totalling_N(numbers: List[int], total_N: int, n_numbers: int) ->
     Returns
     -------
 
-    A tuple containing the subset of integers which sum to the total
+    A tuple containing the first subset of integers, in itertools.combinations
+    order, which sum to the total
 
     '''
+    if n_numbers < 1:
+        if total_N == 0:
+            return ()
+        raise ValueError(f"Could not find subset which summates to {total_N}")
 
-    for combo in combinations(numbers, n_numbers):
-        if sum(combo) == total_N:
-            return tuple(combo)
+    # No combination can reach a total outside the smallest/largest achievable sums
+    if len(numbers) < n_numbers or not sum(nsmallest(n_numbers, numbers)) <= total_N <= sum(nlargest(n_numbers, numbers)):
+        raise ValueError(f"Could not find subset which summates to {total_N}")
+
+    _positions: Dict[int, List[int]] = {}
+    for i, number in enumerate(numbers):
+        _positions.setdefault(number, []).append(i)
+
+    _indices = _first_k_sum(numbers, _positions, 0, total_N, n_numbers)
+
+    if _indices is None:
+        raise ValueError(f"Could not find subset which summates to {total_N}")
+
+    return tuple(numbers[i] for i in _indices)
+
+
+def _half_subset_sums(numbers: List[int], n_numbers: int) -> Dict[int, List[Tuple[int, ...]]]:
+    '''
+    Group every index combination of the given size by the sum of its values,
+    each group ordered by descending first index
+
+
+    Arguments
+    ---------
+
+    numbers     list of numbers to combine
+    n_numbers   size of each combination
+
+
+    Returns
+    -------
+
+    Dictionary with sums as keys and lists of index tuples as values
+
+    '''
+    _sums: Dict[int, List[Tuple[int, ...]]] = {}
+
+    for combo in combinations(range(len(numbers)), n_numbers):
+        _sums.setdefault(sum(numbers[i] for i in combo), []).append(combo)
+
+    for combos in _sums.values():
+        combos.sort(key=lambda c: c[0], reverse=True)
+
+    return _sums
+
+
+def iter_numbers_totalling_N(numbers: List[int], total_N: int, n_numbers: int) -> Iterator[Tuple[int, ...]]:
+    '''
+    Lazily generate every subset of numbers in a list which sum to the given total
+
+    Each combination of list positions is produced exactly once, so repeated
+    values within the list give distinct solutions. Subsets of four or more
+    numbers are found by meeting in the middle over half-subset sums.
+
+
+    Arguments
+    ---------
+
+    numbers     list of numbers to search
+    total_N     total to be met by summing subset
+    n_numbers   size of the subset
+
+
+    Returns
+    -------
+
+    Generator of tuples containing integers which sum to the total, in the
+    order they appear within the input list
+
+    '''
+    if n_numbers < 1:
+        if total_N == 0:
+            yield ()
+        return
+
+    if n_numbers == 1:
+        for number in numbers:
+            if number == total_N:
+                yield (number,)
+        return
+
+    if n_numbers <= 3:
+        # Fix the leading positions then hash search the pair over later positions
+        for lead in combinations(range(len(numbers)), n_numbers - 2):
+            _remainder = total_N - sum(numbers[i] for i in lead)
+            _seen: Dict[int, List[int]] = {}
+            for j in range(lead[-1] + 1 if lead else 0, len(numbers)):
+                for i in _seen.get(_remainder - numbers[j], []):
+                    yield tuple(numbers[x] for x in lead) + (numbers[i], numbers[j])
+                _seen.setdefault(numbers[j], []).append(j)
+        return
+
+    # Split each ordered set of positions into a left half and a right half whose
+    # positions all follow the left, so every subset is decomposed exactly once
+    _n_left = n_numbers // 2
+    _right_sums = _half_subset_sums(numbers, n_numbers - _n_left)
+
+    for left in combinations(range(len(numbers)), _n_left):
+        for right in _right_sums.get(total_N - sum(numbers[i] for i in left), []):
+            if right[0] <= left[-1]:
+                break
+            yield tuple(numbers[i] for i in left + right)
+
+
+def count_numbers_totalling_N(numbers: List[int], total_N: int, n_numbers: int) -> int:
+    '''
+    Count the subsets of numbers in a list which sum to the given total without
+    enumerating them, using the same meet in the middle decomposition as
+    iter_numbers_totalling_N
+
+
+    Arguments
+    ---------
+
+    numbers     list of numbers to search
+    total_N     total to be met by summing subset
+    n_numbers   size of the subset
+
+
+    Returns
+    -------
+
+    Number of combinations of list positions whose values sum to the total
+
+    '''
+    if n_numbers < 4:
+        return sum(1 for _ in iter_numbers_totalling_N(numbers, total_N, n_numbers))
+
+    _n_left = n_numbers // 2
+    _right_starts = {
+        s: sorted(c[0] for c in combos)
+        for s, combos in _half_subset_sums(numbers, n_numbers - _n_left).items()
+    }
+
+    _count = 0
+
+    for left in combinations(range(len(numbers)), _n_left):
+        _starts = _right_starts.get(total_N - sum(numbers[i] for i in left))
+        if _starts:
+            _count += len(_starts) - bisect_right(_starts, left[-1])
+
+    return _count
+
+
+def stream_numbers(feed: Iterable[str]) -> Iterator[int]:
+    '''
+    Lazily convert single values from a line feed to integers, skipping blank lines
     
-    raise ValueError(f"Could not find subset which summates to {total_N}")
+
+    Arguments
+    ---------
+
+    feed        any iterable of lines, e.g. an open file handle
+
+
+    Returns
+    -------
+
+    Generator of the integers within the feed
+
+    '''
+    for line in feed:
+        _line = line.strip().replace('\\', '')
+        if _line:
+            yield int(_line)
+
+
+def stream_numbers_totalling_N(feed: Iterable[str], total_N: int, find_triple: bool = False) -> Iterator[Tuple[int, ...]]:
+    '''
+    Find subsets of two (and optionally three) numbers which sum to the given total
+    from a feed of values, emitting each as soon as the values read make it possible
+
+    Only a running hash set of values (and, for triples, a map from pairwise sums
+    to pairs) is kept, the feed itself is never loaded in full.
+
+
+    Arguments
+    ---------
+
+    feed        any iterable of lines, e.g. an open file handle
+    total_N     total to be met by summing subset
+
+    Optional Arguments
+    ------------------
+
+    find_triple also search for a subset of three numbers
+
+
+    Returns
+    -------
+
+    Generator yielding the first pair, and if requested the first triple, in the
+    order they are found, values within each in the order they were read
+
+    '''
+    _seen: Set[int] = set()
+    _pair_sums: Dict[int, Tuple[int, int]] = {}
+    _pair_found = False
+    _triple_found = not find_triple
+
+    for number in stream_numbers(feed):
+        if not _pair_found and total_N - number in _seen:
+            _pair_found = True
+            yield total_N - number, number
+
+        if not _triple_found:
+            if total_N - number in _pair_sums:
+                _triple_found = True
+                yield _pair_sums[total_N - number] + (number,)
+            else:
+                for value in _seen:
+                    _pair_sums.setdefault(value + number, (value, number))
+
+        if _pair_found and _triple_found:
+            return
+
+        _seen.add(number)
 
 
 def tidy_data(input_file: str) -> List[int]:
@@ -8,7 +8,17 @@
 #############################################################################################
 
 import os
-from typing import Dict, List
+import re
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from tabulate import tabulate
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+RESULTS_MODES = ('list', 'bits', 'count')
+
+_POLICY_LINE_FINDER = re.compile(rb'^[ \t]*([0-9]+)-([0-9]+)[ \t]+(\S):[ \t]*(\S*)[ \t\r]*$', re.MULTILINE)
+_NON_BLANK_LINE_FINDER = re.compile(rb'^[ \t\r]*\S', re.MULTILINE)
 
 
 def check_password_sled_rental(pswd_cp: str, password: str) -> bool:
@@ -61,9 +71,65 @@ def check_password_toboggan_corp(pswd_cp: str, password: str) -> bool:
     _permitted_indices, char = pswd_cp.split(' ')
     _permitted_indices = [int(i) for i in _permitted_indices.split('-')]
 
+    if any(i < 1 or i > len(password) for i in _permitted_indices):
+        raise ValueError(f"Positions {_permitted_indices} lie outside of password '{password}'")
+
     return sum([password[i-1] == char for i in _permitted_indices]) == 1
 
-def process_file(input_file: str) -> Dict[str, Dict]:
+def _new_results(results_mode: str, policies: Iterable[str] = ('sled', 'toboggan')) -> Dict[str, Dict]:
+    '''Create empty results containers for each policy in the given results mode'''
+    if results_mode not in RESULTS_MODES:
+        raise ValueError(f"Invalid results mode '{results_mode}', expected one of {RESULTS_MODES}")
+
+    _results: Dict[str, Dict] = {t: {'num': 0, 'denom': 0} for t in policies}
+
+    for policy in _results:
+        if results_mode == 'list':
+            _results[policy]['list'] = []
+        elif results_mode == 'bits':
+            _results[policy]['bits'] = bytearray()
+
+    return _results
+
+
+def _record_result(policy_results: Dict, passed: bool) -> None:
+    '''Update the counters and any stored per-entry results for a single check'''
+    _index = policy_results['denom']
+
+    if 'list' in policy_results:
+        policy_results['list'].append(passed)
+    elif 'bits' in policy_results:
+        if _index % 8 == 0:
+            policy_results['bits'].append(0)
+        if passed:
+            policy_results['bits'][-1] |= 1 << (_index % 8)
+
+    policy_results['num'] += passed
+    policy_results['denom'] += 1
+
+
+def unpack_result_bits(bits: bytes, n_entries: int) -> List[bool]:
+    '''
+    Expand a packed per-entry results bit array into a list of booleans
+
+
+    Arguments
+    ---------
+
+    bits            packed results, entry i held in bit (i % 8) of byte (i // 8)
+    n_entries       number of entries held in the bit array
+
+
+    Returns
+    -------
+
+    List of pass/fail results for each entry
+
+    '''
+    return [bool(bits[i // 8] >> (i % 8) & 1) for i in range(n_entries)]
+
+
+def process_file(input_file: str, results_mode: str = 'list') -> Dict[str, Dict]:
     '''
     Run password checking on a list containing a password and the convention it must
     follow in order to be valid
@@ -74,34 +140,449 @@ def process_file(input_file: str) -> Dict[str, Dict]:
     input_file      File containing conventions along with password in the form, e.g.:
                     '1-3 c: dhsxxccskw'
 
+    Optional Arguments
+    ------------------
+
+    results_mode    how to hold per-entry results: 'list' for lists of booleans,
+                    'bits' for packed bit arrays (1 bit per entry) or 'count' to
+                    keep only the running counters
+
 
     Returns
     -------
 
-    Tuple containing total number of passwords and the number that pass the criteria
+    Dictionary for each policy containing the total number of passwords ('denom'),
+    the number that pass the criteria ('num') and the per-entry results under
+    'list' or 'bits' depending on the results mode
 
     '''
 
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Failed to locate file '{input_file}'")
     
-    _results = {t: {'list': [], 'num': None, 'denom': None} for t in ['sled', 'toboggan']}
+    _results = _new_results(results_mode)
+
     with open(input_file) as f:
-        _lines = f.readlines()
-        for line in _lines:
+        for line in f:
             password_cp, password = line.split(':')
             password_cp = password_cp.strip()
             password = password.strip()
-            _results['sled']['list'].append(check_password_sled_rental(password_cp, password))
-            _results['toboggan']['list'].append(check_password_toboggan_corp(password_cp, password))
+            _record_result(_results['sled'], check_password_sled_rental(password_cp, password))
+            _record_result(_results['toboggan'], check_password_toboggan_corp(password_cp, password))
+
+    return _results
+
+def parse_password_data(raw_data: bytes) -> Dict[str, np.ndarray]:
+    '''
+    Parse the full contents of a password file with a single regular expression
+    into columnar arrays
+
+
+    Arguments
+    ---------
+
+    raw_data        raw bytes of a file containing conventions along with passwords
+                    in the form, e.g.: '1-3 c: dhsxxccskw'
+
+
+    Returns
+    -------
+
+    Dictionary of arrays for the policy lower value ('lo'), upper value ('hi'),
+    policy character ('char') as uint8 codes and the passwords ('password') as
+    a fixed width uint8 matrix padded with zeros
+
+    Raises a ValueError if any non-blank line is not of the expected form, or if
+    either policy value is not a 1-based position within the password
+
+    '''
+    _entries = _POLICY_LINE_FINDER.findall(raw_data)
+
+    if len(_entries) != len(_NON_BLANK_LINE_FINDER.findall(raw_data)):
+        for i, line in enumerate(raw_data.splitlines()):
+            if line.strip() and not _POLICY_LINE_FINDER.fullmatch(line):
+                raise ValueError(f"Invalid password entry on line {i+1}: {line.decode(errors='replace')!r}")
+
+    if not _entries:
+        return {
+            'lo': np.empty(0, dtype=np.int64),
+            'hi': np.empty(0, dtype=np.int64),
+            'char': np.empty(0, dtype=np.uint8),
+            'password': np.empty((0, 1), dtype=np.uint8)
+        }
+
+    _lo, _hi, _char, _password = zip(*_entries)
+
+    _password_arr = np.array(_password, dtype=bytes)
+    _width = max(_password_arr.dtype.itemsize, 1)
+
+    _lo_arr, _hi_arr = np.array(_lo, dtype=np.int64), np.array(_hi, dtype=np.int64)
+    _lengths = np.char.str_len(_password_arr)
+    _out_of_range = np.flatnonzero((np.minimum(_lo_arr, _hi_arr) < 1) | (np.maximum(_lo_arr, _hi_arr) > _lengths))
+
+    if _out_of_range.size:
+        # Entries match the non-blank lines one to one
+        _line_index, _line = [(i, line) for i, line in enumerate(raw_data.split(b'\n')) if line.strip()][_out_of_range[0]]
+        raise ValueError(f"Password positions out of range on line {_line_index+1}: {_line.decode(errors='replace')!r}")
+
+    return {
+        'lo': _lo_arr,
+        'hi': _hi_arr,
+        'char': np.frombuffer(b''.join(_char), dtype=np.uint8),
+        'password': _password_arr.astype(f'S{_width}').view(np.uint8).reshape(-1, _width)
+    }
+
 
-    _results['sled']['denom'] = len(_results['sled']['list'])
-    _results['sled']['num'] = sum(_results['sled']['list'])
-    _results['toboggan']['denom'] = len(_results['toboggan']['list'])
-    _results['toboggan']['num'] = sum(_results['toboggan']['list'])
+def _char_at(passwords: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    '''Gather the character code at each 1-based position, checked by parse_password_data'''
+    return passwords[np.arange(passwords.shape[0]), positions - 1]
+
+
+def sled_rental_rule(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    '''
+    Vectorized form of check_password_sled_rental over columnar password data
+
+
+    Arguments
+    ---------
+
+    columns     columnar password data as returned by parse_password_data
+
+
+    Returns
+    -------
+
+    Boolean array of per-entry results
+
+    '''
+    _count = (columns['password'] == columns['char'][:, None]).sum(axis=1)
+    return (_count >= columns['lo']) & (_count <= columns['hi'])
+
+
+def toboggan_corp_rule(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    '''
+    Vectorized form of check_password_toboggan_corp over columnar password data
+
+
+    Arguments
+    ---------
+
+    columns     columnar password data as returned by parse_password_data
+
+
+    Returns
+    -------
+
+    Boolean array of per-entry results
+
+    '''
+    _first = _char_at(columns['password'], columns['lo']) == columns['char']
+    _second = _char_at(columns['password'], columns['hi']) == columns['char']
+    return _first != _second
+
+
+DEFAULT_POLICIES: Dict[str, Callable[[Dict[str, np.ndarray]], np.ndarray]] = {
+    'sled': sled_rental_rule,
+    'toboggan': toboggan_corp_rule
+}
+
+
+def evaluate_policies_vectorized(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    '''
+    Check every password against both the sled rental and toboggan corporate
+    policies using array operations across all entries at once
+
+
+    Arguments
+    ---------
+
+    columns     columnar password data as returned by parse_password_data
+
+
+    Returns
+    -------
+
+    Dictionary of boolean arrays of per-entry results keyed by policy name
+
+    '''
+    return {policy: rule(columns) for policy, rule in DEFAULT_POLICIES.items()}
+
+
+def _store_array_results(policy_results: Dict, passed: np.ndarray, results_mode: str) -> None:
+    '''Fill the counters and any stored per-entry results from an array of checks'''
+    policy_results['num'] = int(passed.sum())
+    policy_results['denom'] = len(passed)
+
+    if results_mode == 'list':
+        policy_results['list'] = passed
+    elif results_mode == 'bits':
+        policy_results['bits'] = bytearray(np.packbits(passed, bitorder='little').tobytes())
+
+
+def process_file_vectorized(input_file: str, results_mode: str = 'list') -> Dict[str, Dict]:
+    '''
+    Run password checking on a password file as with process_file, parsing the
+    whole file in one pass and validating with vectorized array operations
+
+    Arguments
+    ---------
+
+    input_file      File containing conventions along with password in the form, e.g.:
+                    '1-3 c: dhsxxccskw'
+
+    Optional Arguments
+    ------------------
+
+    results_mode    how to hold per-entry results, as in process_file
+
+
+    Returns
+    -------
+
+    Results dictionary matching that of process_file, with per-entry results
+    in 'list' mode held as boolean arrays
+
+    '''
+
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Failed to locate file '{input_file}'")
+
+    with open(input_file, 'rb') as f:
+        _columns = parse_password_data(f.read())
+
+    _results = _new_results(results_mode)
+
+    for policy, passed in evaluate_policies_vectorized(_columns).items():
+        _store_array_results(_results[policy], passed, results_mode)
 
     return _results
 
+def _newline_aligned_ranges(input_file: str, chunk_size: int) -> List[Tuple[int, int]]:
+    '''
+    Split a file into byte ranges of roughly the given size, with each boundary
+    moved forward to just after the next newline so no line is divided
+
+
+    Arguments
+    ---------
+
+    input_file      address of the file to split
+    chunk_size      target number of bytes per range
+
+
+    Returns
+    -------
+
+    List of (start, end) byte offsets covering the whole file
+
+    '''
+    _file_size = os.path.getsize(input_file)
+    _boundaries = [0]
+
+    with open(input_file, 'rb') as f:
+        while _boundaries[-1] + chunk_size < _file_size:
+            f.seek(_boundaries[-1] + chunk_size)
+            f.readline()
+            if f.tell() >= _file_size:
+                break
+            _boundaries.append(f.tell())
+
+    _boundaries.append(_file_size)
+
+    return list(zip(_boundaries[:-1], _boundaries[1:]))
+
+
+def _count_file_range(input_file: str, start: int, end: int) -> Dict[str, Tuple[int, int]]:
+    '''Validate the passwords within a byte range of a file, returning (num, denom) per policy'''
+    with open(input_file, 'rb') as f:
+        f.seek(start)
+        _columns = parse_password_data(f.read(end - start))
+
+    return {
+        policy: (int(passed.sum()), len(passed))
+        for policy, passed in evaluate_policies_vectorized(_columns).items()
+    }
+
+
+def process_file_parallel(input_file: str, n_workers: Optional[int] = None,
+                          chunk_size: int = 64 * 1024**2) -> Dict[str, Dict]:
+    '''
+    Run password checking on a password file across a pool of processes, each
+    validating newline aligned byte ranges of the file with the vectorized engine
+
+    Arguments
+    ---------
+
+    input_file      File containing conventions along with password in the form, e.g.:
+                    '1-3 c: dhsxxccskw'
+
+    Optional Arguments
+    ------------------
+
+    n_workers       number of worker processes, default is the number of CPUs
+    chunk_size      target number of bytes read by a worker at a time
+
+
+    Returns
+    -------
+
+    Results dictionary matching that of process_file in 'count' results mode
+
+    '''
+
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Failed to locate file '{input_file}'")
+
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+
+    _ranges = _newline_aligned_ranges(input_file, chunk_size)
+
+    _results = _new_results('count')
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        _futures = [executor.submit(_count_file_range, input_file, *r) for r in _ranges]
+        for future in _futures:
+            for policy, (num, denom) in future.result().items():
+                _results[policy]['num'] += num
+                _results[policy]['denom'] += denom
+
+    return _results
+
+class PolicyRegistry:
+    '''
+    Collection of named vectorized password policies which are all evaluated
+    against the same parsed data, keeping pass/fail counters and the time spent
+    evaluating each policy
+
+
+    Optional Arguments
+    ------------------
+
+    policies    initial mapping of policy names to rules, each rule taking the
+                columnar data from parse_password_data and returning a boolean
+                array of per-entry results. Default is the sled rental and
+                toboggan corporate policies.
+
+    '''
+    def __init__(self, policies: Optional[Dict[str, Callable[[Dict[str, np.ndarray]], np.ndarray]]] = None) -> None:
+        self._policies: Dict[str, Callable[[Dict[str, np.ndarray]], np.ndarray]] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+        for name, rule in (DEFAULT_POLICIES if policies is None else policies).items():
+            self.register(name, rule)
+
+    def register(self, name: str, rule: Optional[Callable] = None) -> Callable:
+        '''
+        Register a policy rule under the given name, can also be used as a decorator
+        when no rule is given
+
+
+        Arguments
+        ---------
+
+        name        name of the policy
+
+        Optional Arguments
+        ------------------
+
+        rule        callable taking columnar password data and returning a boolean
+                    array of per-entry results
+
+
+        Returns
+        -------
+
+        The registered rule
+
+        '''
+        if rule is None:
+            return lambda r: self.register(name, r)
+
+        if name in self._policies:
+            raise KeyError(f"Policy '{name}' is already registered")
+
+        self._policies[name] = rule
+        self.stats[name] = {'num': 0, 'denom': 0, 'time': 0.}
+
+        return rule
+
+    @property
+    def policies(self) -> List[str]:
+        return list(self._policies)
+
+    def evaluate(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        '''
+        Evaluate every registered policy against parsed password data, updating
+        the counters and timings for each
+
+
+        Arguments
+        ---------
+
+        columns     columnar password data as returned by parse_password_data
+
+
+        Returns
+        -------
+
+        Dictionary of boolean arrays of per-entry results keyed by policy name
+
+        '''
+        _passed: Dict[str, np.ndarray] = {}
+
+        for name, rule in self._policies.items():
+            _start = perf_counter()
+            _passed[name] = np.asarray(rule(columns), dtype=bool)
+            self.stats[name]['time'] += perf_counter() - _start
+            self.stats[name]['num'] += int(_passed[name].sum())
+            self.stats[name]['denom'] += len(_passed[name])
+
+        return _passed
+
+    def process_file(self, input_file: str, results_mode: str = 'count') -> Dict[str, Dict]:
+        '''
+        Run all registered policies on a password file, parsing it once
+
+        Arguments
+        ---------
+
+        input_file      File containing conventions along with password in the form, e.g.:
+                        '1-3 c: dhsxxccskw'
+
+        Optional Arguments
+        ------------------
+
+        results_mode    how to hold per-entry results, as in process_file
+
+
+        Returns
+        -------
+
+        Results dictionary as for process_file, keyed by registered policy name
+
+        '''
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"Failed to locate file '{input_file}'")
+
+        with open(input_file, 'rb') as f:
+            _columns = parse_password_data(f.read())
+
+        _results = _new_results(results_mode, self._policies)
+
+        for policy, passed in self.evaluate(_columns).items():
+            _store_array_results(_results[policy], passed, results_mode)
+
+        return _results
+
+    def report(self) -> str:
+        '''Tabulate pass/fail counters and evaluation time per policy, most costly first'''
+        _table = [
+            [name, s['num'], s['denom'] - s['num'], f"{1e3*s['time']:.3f}"]
+            for name, s in sorted(self.stats.items(), key=lambda x: x[1]['time'], reverse=True)
+        ]
+        return tabulate(_table, headers=['Policy', 'Pass', 'Fail', 'Time [ms]'])
+
 if __name__ in "__main__":
     DATA_FILE = os.path.join(os.path.dirname(__file__), 'data.txt')
 
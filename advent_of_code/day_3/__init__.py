@@ -9,10 +9,14 @@
 
 import pandas as pd
 import numpy as np
+import mmap
 import os
+import re
 from termcolor import colored
 from tabulate import tabulate
-from typing import Any, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from heapq import nsmallest
 from functools import reduce
 from operator import mul
 from math import ceil
@@ -111,6 +115,447 @@ def df_count_char(df: pd.DataFrame, val: str) -> int:
     return _count
 
 
+def _read_map_bytes(input_file: str) -> np.ndarray:
+    '''Read an ASCII map file into a uint8 array of character codes'''
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Could not find map file '{input_file}'")
+
+    with open(input_file, 'rb') as f:
+        _rows = f.read().split()
+
+    if not _rows:
+        raise AssertionError(f"Map file '{input_file}' is empty")
+
+    if any(len(r) != len(_rows[0]) for r in _rows):
+        raise AssertionError(f"Map file '{input_file}' has rows of differing width")
+
+    return np.frombuffer(b''.join(_rows), dtype=np.uint8).reshape(len(_rows), len(_rows[0]))
+
+
+def map_array(input_file: str, tree_char: str = '#') -> np.ndarray:
+    '''
+    Convert map in ASCII format to a compact boolean array marking trees
+    
+
+    Arguments
+    ---------
+
+    input_file      input file address
+
+    Optional Arguments
+    ------------------
+
+    tree_char       character marking a tree within the map
+
+
+    Returns
+    -------
+
+    Boolean array of shape (rows, columns), True where a tree is present
+
+    '''
+    return _read_map_bytes(input_file) == ord(tree_char)
+
+
+def count_trees(tree_map: np.ndarray, slope_gradient: Tuple[int, int], start_pos: Tuple[int, int] = (0,0)) -> int:
+    '''
+    Count trees encountered travelling down a slope, wrapping around the map
+    columns rather than repeating the map
+
+
+    Arguments
+    ---------
+
+    tree_map        boolean tree array as returned by map_array
+    slope_gradient  step taken as (columns right, rows down)
+
+    Optional Arguments
+    ------------------
+
+    start_pos       starting (row, column) position
+
+
+    Returns
+    -------
+
+    Number of trees encountered along the route
+
+    '''
+    if slope_gradient[1] < 1:
+        raise ValueError(f"Slope must travel down the map, got gradient {slope_gradient}")
+
+    _rows = np.arange(start_pos[0], tree_map.shape[0], slope_gradient[1])
+    _cols = (start_pos[1] + slope_gradient[0]*np.arange(len(_rows))) % tree_map.shape[1]
+
+    return int(tree_map[_rows, _cols].sum())
+
+
+def _route_cells(map_shape: Tuple[int, int], dx: np.ndarray, dy: np.ndarray,
+                 start_pos: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Route index, row and wrapped column of every cell visited by the routes given by paired dx, dy arrays'''
+    _n_steps = np.maximum(0, -(-(map_shape[0] - start_pos[0]) // dy))
+    _route_id = np.repeat(np.arange(len(dx)), _n_steps)
+    _step = np.arange(_n_steps.sum()) - np.repeat(np.cumsum(_n_steps) - _n_steps, _n_steps)
+
+    _rows = start_pos[0] + _step*dy[_route_id]
+    _cols = (start_pos[1] + _step*dx[_route_id]) % map_shape[1]
+
+    return _route_id, _rows, _cols
+
+
+def _route_tree_counts(tree_map: np.ndarray, dx: np.ndarray, dy: np.ndarray,
+                       start_pos: Tuple[int, int]) -> np.ndarray:
+    '''Count trees along every route given by paired dx, dy arrays in one gather'''
+    _route_id, _rows, _cols = _route_cells(tree_map.shape, dx, dy, start_pos)
+
+    return np.bincount(_route_id, weights=tree_map[_rows, _cols], minlength=len(dx)).astype(np.int64)
+
+
+def count_trees_many(tree_map: np.ndarray, slope_gradients: List[Tuple[int, int]],
+                     start_pos: Tuple[int, int] = (0,0)) -> Tuple[Dict[Tuple[int, int], int], int]:
+    '''
+    Count trees encountered for many slopes at once, gathering the cells visited
+    by every route from the tree map in a single vectorized lookup
+
+
+    Arguments
+    ---------
+
+    tree_map        boolean tree array as returned by map_array
+    slope_gradients list of steps taken as (columns right, rows down)
+
+    Optional Arguments
+    ------------------
+
+    start_pos       starting (row, column) position
+
+
+    Returns
+    -------
+
+    Tuple containing a dictionary of tree counts keyed by gradient, and the
+    product of the counts for every gradient given (repeated gradients being
+    evaluated once but included in the product each time they appear)
+
+    '''
+    _gradients = list(dict.fromkeys(tuple(g) for g in slope_gradients))
+
+    if not _gradients:
+        return {}, 1
+
+    _dx, _dy = np.array(_gradients, dtype=np.int64).T
+
+    if (_dy < 1).any():
+        raise ValueError(f"Slopes must travel down the map, got gradients {slope_gradients}")
+
+    _counts = _route_tree_counts(tree_map, _dx, _dy, start_pos)
+    _counts_dict = {g: int(c) for g, c in zip(_gradients, _counts)}
+
+    return _counts_dict, reduce(mul, (_counts_dict[tuple(g)] for g in slope_gradients), 1)
+
+
+def count_trees_streaming(input_file: str, slope_gradient: Tuple[int, int],
+                          start_pos: Tuple[int, int] = (0,0), tree_char: str = '#') -> int:
+    '''
+    Count trees encountered travelling down a slope by memory mapping the map file
+    and reading only the cells on the route, so the map is never loaded in full.
+    All rows of the map must have the same width.
+
+
+    Arguments
+    ---------
+
+    input_file      input file address
+    slope_gradient  step taken as (columns right, rows down)
+
+    Optional Arguments
+    ------------------
+
+    start_pos       starting (row, column) position
+    tree_char       character marking a tree within the map
+
+
+    Returns
+    -------
+
+    Number of trees encountered along the route
+
+    '''
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Could not find map file '{input_file}'")
+
+    if slope_gradient[1] < 1:
+        raise ValueError(f"Slope must travel down the map, got gradient {slope_gradient}")
+
+    if os.path.getsize(input_file) == 0:
+        raise AssertionError(f"Map file '{input_file}' is empty")
+
+    _tree = ord(tree_char)
+    _count = 0
+
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _width = mm.find(b'\n')
+        if _width < 0:
+            _width = len(mm)
+        elif _width and mm[_width-1] == ord('\r'):
+            _width -= 1
+
+        # A leading blank row leaves no width to wrap columns around
+        if not _width:
+            if not re.search(rb'\S', mm):
+                raise AssertionError(f"Map file '{input_file}' is empty")
+            raise AssertionError(f"Map file '{input_file}' has rows of differing width")
+
+        _newline = mm[_width:_width+2] if mm[_width:_width+1] == b'\r' else mm[_width:_width+1]
+        _row_stride = _width + len(_newline)
+
+        _row, _col = start_pos
+
+        while _row*_row_stride + _width <= len(mm):
+            _row_end = _row*_row_stride + _width
+            if mm[_row_end:_row_end+len(_newline)] not in (_newline, b''):
+                raise AssertionError(f"Map file '{input_file}' has rows of differing width")
+            _count += mm[_row*_row_stride + _col % _width] == _tree
+            _row += slope_gradient[1]
+            _col += slope_gradient[0]
+
+    return _count
+
+
+def map_terrain(input_file: str, terrain_symbols: str = '.#') -> np.ndarray:
+    '''
+    Convert map in ASCII format to an array of small integer terrain codes
+    
+
+    Arguments
+    ---------
+
+    input_file      input file address
+
+    Optional Arguments
+    ------------------
+
+    terrain_symbols string of the characters used within the map, the code for each
+                    terrain being the position of its character in the string
+
+
+    Returns
+    -------
+
+    uint8 array of shape (rows, columns) of terrain codes
+
+    '''
+    if len(terrain_symbols) > 255 or len(set(terrain_symbols)) != len(terrain_symbols):
+        raise ValueError(f"Terrain symbols must be at most 255 unique characters, got '{terrain_symbols}'")
+
+    _unknown = len(terrain_symbols)
+    _lookup = np.full(256, _unknown, dtype=np.uint8)
+    _lookup[np.frombuffer(terrain_symbols.encode('ascii'), dtype=np.uint8)] = np.arange(_unknown)
+
+    _terrain = _lookup[_read_map_bytes(input_file)]
+
+    if (_terrain == _unknown).any():
+        raise ValueError(f"Map file '{input_file}' contains symbols other than '{terrain_symbols}'")
+
+    return _terrain
+
+
+def terrain_histograms(terrain_map: np.ndarray, slope_gradients: List[Tuple[int, int]],
+                       n_terrains: int, start_pos: Tuple[int, int] = (0,0)) -> Dict[Tuple[int, int], np.ndarray]:
+    '''
+    Count each terrain type encountered for many slopes at once, reading the cells
+    visited straight from the terrain map without modifying or copying it
+
+
+    Arguments
+    ---------
+
+    terrain_map     terrain code array as returned by map_terrain
+    slope_gradients list of steps taken as (columns right, rows down)
+    n_terrains      number of terrain codes, i.e. the number of terrain symbols
+                    given to map_terrain, so that histograms of different maps
+                    always have the same length
+
+    Optional Arguments
+    ------------------
+
+    start_pos       starting (row, column) position
+
+
+    Returns
+    -------
+
+    Dictionary keyed by gradient of arrays holding the number of cells of each
+    terrain code encountered along the route
+
+    '''
+    _gradients = list(dict.fromkeys(tuple(g) for g in slope_gradients))
+
+    if not _gradients:
+        return {}
+
+    if terrain_map.size and int(terrain_map.max()) >= n_terrains:
+        raise ValueError(f"Terrain map contains codes outside of range 0-{n_terrains-1}")
+
+    _dx, _dy = np.array(_gradients, dtype=np.int64).T
+
+    if (_dy < 1).any():
+        raise ValueError(f"Slopes must travel down the map, got gradients {slope_gradients}")
+
+    _route_id, _rows, _cols = _route_cells(terrain_map.shape, _dx, _dy, start_pos)
+
+    _histograms = np.bincount(
+        _route_id*n_terrains + terrain_map[_rows, _cols],
+        minlength=len(_gradients)*n_terrains
+    ).reshape(len(_gradients), n_terrains)
+
+    return dict(zip(_gradients, _histograms))
+
+
+_WORKER_TREE_MAP: Optional[np.ndarray] = None
+
+
+def _init_search_worker(tree_map: np.ndarray) -> None:
+    '''Hold the tree map once per search worker process'''
+    global _WORKER_TREE_MAP
+    _WORKER_TREE_MAP = tree_map
+
+
+def _search_batch(dx: np.ndarray, dy: np.ndarray, start_pos: Tuple[int, int]) -> np.ndarray:
+    '''Evaluate a batch of gradients against the tree map held by a search worker'''
+    return _route_tree_counts(_WORKER_TREE_MAP, dx, dy, start_pos)
+
+
+def find_best_gradients(tree_map: np.ndarray, dx_values: Iterable[int], dy_values: Iterable[int],
+                        top_n: int = 1, start_pos: Tuple[int, int] = (0,0), batch_size: int = 4096,
+                        n_workers: int = 1) -> List[Tuple[Tuple[int, int], int]]:
+    '''
+    Search every combination of the given column and row steps for the gradients
+    encountering the fewest trees
+
+    The tree map rows act as per-row bitsets which are gathered from in batches
+    of gradients. As a route's columns wrap, gradients whose column steps are
+    equal modulo the map width visit the same cells and are evaluated only once.
+
+
+    Arguments
+    ---------
+
+    tree_map        boolean tree array as returned by map_array
+    dx_values       candidate column steps
+    dy_values       candidate row steps, all positive
+
+    Optional Arguments
+    ------------------
+
+    top_n           number of gradients to return
+    start_pos       starting (row, column) position
+    batch_size      number of distinct gradients evaluated per gather
+    n_workers       number of processes to evaluate batches across, the default
+                    of 1 evaluates within the current process
+
+
+    Returns
+    -------
+
+    List of up to top_n (gradient, tree count) pairs, ordered by ascending tree
+    count then gradient
+
+    '''
+    _dx_values = np.unique(np.fromiter(dx_values, dtype=np.int64))
+    _dy_values = np.unique(np.fromiter(dy_values, dtype=np.int64))
+
+    if (_dy_values < 1).any():
+        raise ValueError(f"Slopes must travel down the map, got row steps {_dy_values}")
+
+    if not _dx_values.size or not _dy_values.size or top_n < 1:
+        return []
+
+    _dx_wrapped = np.unique(_dx_values % tree_map.shape[1])
+    _dx, _dy = (a.ravel() for a in np.meshgrid(_dx_wrapped, _dy_values))
+    _batches = [(_dx[i:i+batch_size], _dy[i:i+batch_size]) for i in range(0, len(_dx), batch_size)]
+
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_search_worker,
+                                 initargs=(tree_map,)) as executor:
+            _counts = list(executor.map(_search_batch, *zip(*_batches), [start_pos]*len(_batches)))
+    else:
+        _counts = [_route_tree_counts(tree_map, dx, dy, start_pos) for dx, dy in _batches]
+
+    _wrapped_counts = dict(zip(zip(_dx.tolist(), _dy.tolist()), np.concatenate(_counts).tolist()))
+
+    _candidates = (
+        ((dx, dy), _wrapped_counts[(dx % tree_map.shape[1], dy)])
+        for dy in _dy_values.tolist() for dx in _dx_values.tolist()
+    )
+
+    return nsmallest(top_n, _candidates, key=lambda x: (x[1], x[0]))
+
+
+ROUTE_COLOURS = {
+    'open': colored(' ', 'white'),
+    'tree': colored('#', 'green'),
+    'route_open': colored('o', 'blue'),
+    'route_tree': colored('X', 'red')
+}
+
+
+def render_route(tree_map: np.ndarray, slope_gradient: Tuple[int, int], n_rows: int, n_cols: int,
+                 origin: Tuple[int, int] = (0,0), start_pos: Tuple[int, int] = (0,0)) -> str:
+    '''
+    Render a viewport of a route down the slope, colouring only the cells within
+    the requested window
+
+    The map is treated as repeating to the right, the viewport being located
+    within the repeated map. Cost is proportional to the viewport size rather
+    than that of the map.
+
+
+    Arguments
+    ---------
+
+    tree_map        boolean tree array as returned by map_array
+    slope_gradient  step taken as (columns right, rows down)
+    n_rows          number of rows in the viewport
+    n_cols          number of columns in the viewport
+
+    Optional Arguments
+    ------------------
+
+    origin          (row, column) of the top left cell of the viewport
+    start_pos       starting (row, column) position of the route
+
+
+    Returns
+    -------
+
+    Rendered viewport with one line per map row
+
+    '''
+    if slope_gradient[1] < 1:
+        raise ValueError(f"Slope must travel down the map, got gradient {slope_gradient}")
+
+    _rows = range(max(origin[0], 0), min(origin[0] + n_rows, tree_map.shape[0]))
+    _cols = np.arange(origin[1], origin[1] + n_cols)
+
+    _lines = []
+
+    for row in _rows:
+        _trees = tree_map[row, _cols % tree_map.shape[1]]
+        _cells = [ROUTE_COLOURS['tree'] if t else ROUTE_COLOURS['open'] for t in _trees]
+
+        _step, _remainder = divmod(row - start_pos[0], slope_gradient[1])
+        _route_col = start_pos[1] + _step*slope_gradient[0]
+
+        if _step >= 0 and not _remainder and origin[1] <= _route_col < origin[1] + n_cols:
+            _index = _route_col - origin[1]
+            _cells[_index] = ROUTE_COLOURS['route_tree'] if _trees[_index] else ROUTE_COLOURS['route_open']
+
+        _lines.append(' '.join(_cells))
+
+    return '\n'.join(_lines)
+
+
 if __name__ in "__main__":
     DATA_FILE = os.path.join(os.path.dirname(__file__), 'data.txt')
 
@@ -118,20 +563,15 @@ if __name__ in "__main__":
 
     GRADIENTS = [(1, 1), (3, 1), (5, 1), (7, 1), (1, 2)]
 
-    _map_df = map_dataframe(DATA_FILE)
-
-    _travel_dfs = [travel_down_slope(_map_df, i) for i in GRADIENTS]
+    _tree_map = map_array(DATA_FILE)
 
-    _n_trees = [df_count_char(i, 'X') for i in _travel_dfs]
+    _n_trees, _product = count_trees_many(_tree_map, GRADIENTS)
 
-    _table = [[f'-{g[1]}/{g[0]}', n] for g, n in zip(GRADIENTS, _n_trees)]
+    _table = [[f'-{g[1]}/{g[0]}', n] for g, n in _n_trees.items()]
 
     _table = tabulate(_table, headers=['dy/dx', '# Trees'], tablefmt='fancy_grid')
 
-    _example = _travel_dfs[0].replace('.', colored(' ', 'white'))
-    _example = _example.replace('#', colored('#', 'green'))
-    _example = _example.replace('O', colored('o', 'blue'))
-    _example = _example.replace('X', colored('X', 'red'))
+    _example = render_route(_tree_map, GRADIENTS[0], N, N)
 
     print(f'''
 
@@ -141,7 +581,7 @@ if __name__ in "__main__":
 
 {_table}
 
-Product of all Totals: {reduce(mul, _n_trees, 1)}
+Product of all Totals: {_product}
 
 ######################################################
           EXAMPLE ROUTE FOR GRADIENT -2
@@ -149,5 +589,5 @@ Product of all Totals: {reduce(mul, _n_trees, 1)}
 
 First {N} Rows:
 
-{_example.head(N).iloc[:,0:N].to_string(header=False, index=False)}
+{_example}
     ''')
@@ -7,9 +7,30 @@
 #                                                                                           #
 #############################################################################################
 
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import io
 import os
 import re
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from time import perf_counter
+
+_ITEM_FINDER = re.compile(r'([a-z]+):([a-z0-9\#]+)', re.IGNORECASE)
+_HEIGHT_CHECK_CM = re.compile(r'([0-9]+)cm', re.IGNORECASE)
+_HEIGHT_CHECK_IN = re.compile(r'([0-9]+)in', re.IGNORECASE)
+_HAIR_CHECK = re.compile(r'(#[0-9a-f]{6})', re.IGNORECASE)
+
+PASSPORT_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'byr': {'name': "Birth Year", 'range': (1920, 2002)},
+    'iyr': {'name': "Issue Year", 'range': (2010, 2020)},
+    'eyr': {'name': "Expiration Year", 'range': (2020, 2030)},
+    'hgt': {'name': "Height", 'units': {'in': (59, 76), 'cm': (150, 193)}},
+    'hcl': {'name': "Hair Color", 'pattern': r'#[0-9a-f]{6}'},
+    'ecl': {'name': "Eye Color", 'choices': ['amb', 'blu', 'brn', 'gry', 'grn', 'hzl', 'oth']},
+    'pid': {'name': "Passport ID", 'pattern': r'[0-9]{9}'}
+}
 
 
 def passport_validator(passport_data: Dict[str, str], rules_dict: Dict[str, Dict]) -> bool:
@@ -62,10 +83,7 @@ def extract_passport_data(raw_data: str) -> Dict[str, str]:
     A dictionary of the processed data
 
     '''
-    
-    _item_find = re.compile(r'([a-z]+):([a-z0-9\#]+)', re.IGNORECASE)
-
-    _items = _item_find.findall(raw_data)
+    _items = _ITEM_FINDER.findall(raw_data)
 
     if not _items:
         raise AssertionError(f'Failed to extract data from raw data string')
@@ -79,6 +97,53 @@ def extract_passport_data(raw_data: str) -> Dict[str, str]:
     return _out_dict
 
 
+def iter_passport_data(passport_file: TextIO, buffer_size: int = 64*1024) -> Iterator[Dict[str, str]]:
+    '''
+    Lazily read passports from an open file, yielding each one as soon as the
+    blank line ending it (or the end of the file) is reached
+
+
+    Arguments
+    ---------
+
+    passport_file   open text file handle of passport data
+
+    Optional Arguments
+    ------------------
+
+    buffer_size     number of characters read from the file at a time
+
+
+    Returns
+    -------
+
+    Generator of dictionaries containing passport data
+
+    '''
+    _passport_raw: List[str] = []
+    _partial_line = ''
+
+    while True:
+        _chunk = passport_file.read(buffer_size)
+        _lines = (_partial_line + _chunk).split('\n')
+
+        # The last line may continue into the next chunk unless the file has ended
+        _partial_line = _lines.pop() if _chunk else ''
+
+        for line in _lines:
+            if line.strip():
+                _passport_raw.append(line.strip())
+            elif _passport_raw:
+                yield extract_passport_data(' '.join(_passport_raw))
+                _passport_raw = []
+
+        if not _chunk:
+            break
+
+    if _passport_raw:
+        yield extract_passport_data(' '.join(_passport_raw))
+
+
 def read_passport_data(input_file: str) -> List[Dict[str, str]]:
     '''
     Read passport data from file and convert to list of dictionaries
@@ -97,28 +162,14 @@ def read_passport_data(input_file: str) -> List[Dict[str, str]]:
 
     '''
 
-    _passports: List[Dict[str, str]] = []
-
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Failed to read passport data file '{input_file}'")
 
-    
-    _entry_data = open(input_file).readlines()
-
-    if not _entry_data:
+    if not os.path.getsize(input_file):
         raise AssertionError(f'Data input file is empty')
 
-    _passport_raw: List[str] = []
-
-    for line in _entry_data:
-        if not line.strip():
-            _passport = extract_passport_data(' '.join(_passport_raw))
-            _passports.append(_passport)
-            _passport_raw = []
-        else:
-            _passport_raw.append(line.strip())
-
-    return _passports
+    with open(input_file) as f:
+        return list(iter_passport_data(f))
 
 
 def check_height(height_str: str, range_cm: Tuple[int, int],
@@ -141,11 +192,8 @@ def check_height(height_str: str, range_cm: Tuple[int, int],
     True if constraint is satisfied else False
 
     '''
-    _height_check_cm = re.compile(r'([0-9]+)cm', re.IGNORECASE)
-    _height_check_in = re.compile(r'([0-9]+)in', re.IGNORECASE)
-
-    _height_cm = _height_check_cm.findall(height_str)
-    _height_in = _height_check_in.findall(height_str)
+    _height_cm = _HEIGHT_CHECK_CM.findall(height_str)
+    _height_in = _HEIGHT_CHECK_IN.findall(height_str)
 
     if not _height_in and not _height_cm:
         return False
@@ -161,54 +209,632 @@ def check_height(height_str: str, range_cm: Tuple[int, int],
 
 def check_hair(hair_str: str) -> bool:
 
-    _hair_check = re.compile(r'(#[0-9a-f]{6})', re.IGNORECASE)
-
     if len(hair_str) > 7:
         return False
 
-    _hair_id = _hair_check.findall(hair_str)
+    _hair_id = _HAIR_CHECK.findall(hair_str)
 
     return len(_hair_id) == 1
 
-if __name__ in "__main__":
-    DATA_FILE = os.path.join(os.path.dirname(__file__), 'data.txt')
 
-    REQUIRED_FIELDS = {
-        'byr' : {
-            'name': "Birth Year",
-            'rule': lambda x: int(x) >= 1920 and int(x) <= 2002
-        },
-        'iyr' : {
-            'name': "Issue Year",
-            'rule': lambda x: int(x) >= 2010 and int(x) <= 2020
-        },
-        'eyr' : {
-            'name': "Expiration Year",
-            'rule': lambda x: int(x) >= 2020 and int(x) <= 2030
-        },
-        'hgt' : {
-            'name': "Height",
-            'rule': lambda x: check_height(x, (150, 193), (59, 76))
-        },
-        'hcl' : {
-            'name': "Hair Color",
-            'rule': lambda x: check_hair(x)
-        },
-        'ecl' : {
-            'name': "Eye Color",
-            'rule': lambda x: x in ['amb', 'blu', 'brn', 'gry',
-                                    'grn', 'hzl', 'oth']
-        },
-        'pid' : {
-            'name': "Passport ID",
-            'rule': lambda x: x.isdigit() and len(x) == 9
+def _compile_field_rule(field: str, spec: Dict[str, Any]) -> Callable[[str], bool]:
+    '''
+    Compile the rule of a single schema field into a check on the field value
+
+
+    Arguments
+    ---------
+
+    field       name of the field
+    spec        schema entry for the field containing one of the rule keys
+                'range', 'units', 'pattern' or 'choices'
+
+
+    Returns
+    -------
+
+    Function returning True if a value satisfies the rule else False
+
+    '''
+    _rule_keys = [k for k in ('range', 'units', 'pattern', 'choices') if k in spec]
+
+    if len(_rule_keys) != 1:
+        raise ValueError(f"Schema entry for '{field}' must have exactly one rule, got {_rule_keys}")
+
+    if 'range' in spec:
+        _lo, _hi = (int(i) for i in spec['range'])
+        return lambda x: x.isdigit() and _lo <= int(x) <= _hi
+
+    if 'units' in spec:
+        _finders = [
+            (re.compile(r'([0-9]+)' + re.escape(u), re.IGNORECASE), int(lo), int(hi))
+            for u, (lo, hi) in spec['units'].items()
+        ]
+
+        def _check_units(x: str) -> bool:
+            for finder, lo, hi in _finders:
+                _match = finder.search(x)
+                if _match:
+                    return lo <= int(_match.group(1)) <= hi
+            return False
+
+        return _check_units
+
+    if 'pattern' in spec:
+        _pattern = re.compile(spec['pattern'], re.IGNORECASE)
+        return lambda x: _pattern.fullmatch(x) is not None
+
+    _choices = frozenset(spec['choices'])
+    return lambda x: x in _choices
+
+
+def compile_validation_plan(schema: Dict[str, Dict[str, Any]] = PASSPORT_SCHEMA) -> List[Tuple[str, Callable[[str], bool]]]:
+    '''
+    Compile a declarative passport schema into a validation plan, with regular
+    expressions compiled, numeric ranges parsed and enumerations frozen up front
+
+
+    Optional Arguments
+    ------------------
+
+    schema      dictionary of required fields, each with a 'name' and one rule:
+                    'range'     inclusive (min, max) integer range
+                    'units'     dictionary of unit suffix to inclusive (min, max),
+                                as for check_height the first unit (in
+                                dictionary order) found anywhere in the value
+                                decides which range applies
+                    'pattern'   regular expression the whole value must match
+                    'choices'   collection of permitted values
+                Default is PASSPORT_SCHEMA.
+
+
+    Returns
+    -------
+
+    List of (field, check) pairs in schema order
+
+    '''
+    return [(field, _compile_field_rule(field, spec)) for field, spec in schema.items()]
+
+
+def validate_passport(passport_data: Dict[str, str], plan: List[Tuple[str, Callable[[str], bool]]]) -> bool:
+    '''
+    Check that a passport information dictionary has valid values using a
+    compiled validation plan
+
+
+    Arguments
+    ---------
+
+    passport_data   dictionary containing key-value pairs of passport data
+    plan            validation plan as returned by compile_validation_plan
+
+
+    Returns
+    -------
+
+    True if all conditions are satisfied else False
+
+    '''
+    for field, check in plan:
+        if field not in passport_data or not check(passport_data[field]):
+            return False
+
+    return True
+
+
+class AdaptiveValidator:
+    '''
+    Passport validator which collects failure rates and costs for each schema
+    rule as it runs, periodically reordering the rules so those most likely to
+    fail cheaply are checked first
+
+    Only failures are counted per passport, with the number of checks made by
+    each rule derived from the failures of the rules before it when the counters
+    are folded into the statistics at each reordering.
+
+
+    Optional Arguments
+    ------------------
+
+    schema          passport schema as for compile_validation_plan, default is
+                    PASSPORT_SCHEMA
+    reorder_every   number of passports validated between rule reorderings
+    time_every      check timings are sampled once per this many passports to
+                    keep the cost of timing itself low
+
+    '''
+    def __init__(self, schema: Dict[str, Dict[str, Any]] = PASSPORT_SCHEMA,
+                 reorder_every: int = 1000, time_every: int = 16) -> None:
+        if reorder_every < 1 or time_every < 1:
+            raise ValueError("Reorder and timing intervals must be positive")
+
+        self.plan = compile_validation_plan(schema)
+        self.names = {field: spec.get('name', field) for field, spec in schema.items()}
+        self.reorder_every = reorder_every
+        self.time_every = time_every
+        self._stats: Dict[str, Dict[str, float]] = {
+            field: {'checked': 0, 'missing': 0, 'invalid': 0, 'timed': 0, 'time': 0.}
+            for field, _ in self.plan
         }
-    }
+        self._n_folded = 0
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self._missing = {field: 0 for field, _ in self.plan}
+        self._invalid = {field: 0 for field, _ in self.plan}
+        self._countdown = self.time_every
+        self._n_cycles = 0
+
+    @property
+    def _n_pending(self) -> int:
+        return self._n_cycles * self.time_every + self.time_every - self._countdown
+
+    @property
+    def n_validated(self) -> int:
+        return self._n_folded + self._n_pending
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        self._fold()
+        return self._stats
+
+    def validate(self, passport_data: Dict[str, str]) -> bool:
+        '''
+        Check that a passport information dictionary has valid values, stopping at
+        the first failing rule
+
+
+        Arguments
+        ---------
+
+        passport_data   dictionary containing key-value pairs of passport data
+
+
+        Returns
+        -------
+
+        True if all conditions are satisfied else False
+
+        '''
+        self._countdown -= 1
+
+        if not self._countdown:
+            return self._validate_timed(passport_data)
+
+        for field, check in self.plan:
+            if field not in passport_data:
+                self._missing[field] += 1
+                return False
+            if not check(passport_data[field]):
+                self._invalid[field] += 1
+                return False
+
+        return True
+
+    __call__ = validate
+
+    def _validate_timed(self, passport_data: Dict[str, str]) -> bool:
+        '''Validate a sampled passport timing each check, reordering when due'''
+        self._countdown = self.time_every
+        self._n_cycles += 1
+
+        _valid = True
+
+        for field, check in self.plan:
+            if field not in passport_data:
+                self._missing[field] += 1
+                _valid = False
+                break
+            _start = perf_counter()
+            _passed = check(passport_data[field])
+            self._stats[field]['time'] += perf_counter() - _start
+            self._stats[field]['timed'] += 1
+            if not _passed:
+                self._invalid[field] += 1
+                _valid = False
+                break
+
+        if self._n_pending >= self.reorder_every:
+            self.reorder()
+
+        return _valid
+
+    def _fold(self) -> None:
+        '''Add the pending failure counters to the per-field statistics'''
+        _n_reaching = self._n_pending
+
+        # The plan order is fixed between folds, so each rule was checked by every
+        # pending passport which did not fail an earlier rule
+        for field, _ in self.plan:
+            _stats = self._stats[field]
+            _stats['checked'] += _n_reaching
+            _stats['missing'] += self._missing[field]
+            _stats['invalid'] += self._invalid[field]
+            _n_reaching -= self._missing[field] + self._invalid[field]
+            self._missing[field] = self._invalid[field] = 0
+
+        self._n_folded += self._n_pending
+        self._countdown = self.time_every
+        self._n_cycles = 0
+
+    def _mean_cost(self, field: str) -> float:
+        _stats = self._stats[field]
+        return _stats['time'] / _stats['timed'] if _stats['timed'] else 0.
+
+    def _fail_rate(self, field: str) -> float:
+        _stats = self._stats[field]
+        return (_stats['missing'] + _stats['invalid']) / _stats['checked'] if _stats['checked'] else 0.
+
+    def reorder(self) -> None:
+        '''
+        Order the rules by increasing expected cost per early exit, i.e. the mean
+        check cost divided by the observed failure rate (smoothed so rules yet to
+        fail are placed last rather than never moved). Rules not yet timed are
+        given the mean cost of those which have been.
+        '''
+        self._fold()
+
+        _timed_costs = [self._mean_cost(f) for f, _ in self.plan if self._stats[f]['timed']]
+
+        if _timed_costs:
+            _default_cost = sum(_timed_costs) / len(_timed_costs)
+
+            def _rank(rule: Tuple[str, Callable[[str], bool]]) -> float:
+                _stats = self._stats[rule[0]]
+                _cost = self._mean_cost(rule[0]) if _stats['timed'] else _default_cost
+                _p_fail = (_stats['missing'] + _stats['invalid'] + 1) / (_stats['checked'] + 2)
+                return _cost / _p_fail
+
+            self.plan.sort(key=_rank)
+
+        self._reset_counters()
+
+    def report(self) -> str:
+        '''Tabulate why passports failed, per field, in the current rule order'''
+        self._fold()
+        _table = [
+            [
+                field, self.names[field], self._stats[field]['checked'],
+                self._stats[field]['missing'], self._stats[field]['invalid'],
+                f"{100*self._fail_rate(field):.1f}", f"{1e6*self._mean_cost(field):.2f}"
+            ]
+            for field, _ in self.plan
+        ]
+        return tabulate(_table, headers=['Field', 'Name', 'Checked', 'Missing', 'Invalid',
+                                         'Fail Rate [%]', 'Mean Cost [us]'])
+
+
+class PassportStore:
+    '''
+    Store of parsed passports with hash indices on chosen fields, serving point
+    lookups of records along with their cached validation result
+
+
+    Arguments
+    ---------
+
+    passports       passport dictionaries, e.g. from iter_passport_data
+
+    Optional Arguments
+    ------------------
+
+    plan            validation plan as returned by compile_validation_plan,
+                    default is the plan for PASSPORT_SCHEMA
+    index_fields    fields to build a hash index on
+
+    '''
+    def __init__(self, passports: Iterable[Dict[str, str]],
+                 plan: Optional[List[Tuple[str, Callable[[str], bool]]]] = None,
+                 index_fields: Iterable[str] = ('pid',)) -> None:
+        self.plan = compile_validation_plan() if plan is None else plan
+        self.records: List[Dict[str, str]] = []
+        self.indices: Dict[str, Dict[str, List[int]]] = {f: {} for f in index_fields}
+        self._valid: List[Optional[bool]] = []
+
+        for passport in passports:
+            for field, index in self.indices.items():
+                if field in passport:
+                    index.setdefault(passport[field], []).append(len(self.records))
+            self.records.append(passport)
+            self._valid.append(None)
+
+    @classmethod
+    def from_file(cls, input_file: str, **kwargs: Any) -> 'PassportStore':
+        '''Build a store from a passport data file in a single streaming pass'''
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"Failed to read passport data file '{input_file}'")
+
+        with open(input_file) as f:
+            return cls(iter_passport_data(f), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def is_valid(self, record_id: int) -> bool:
+        '''Validation result for a stored record, computed on first request then cached'''
+        if self._valid[record_id] is None:
+            self._valid[record_id] = validate_passport(self.records[record_id], self.plan)
+        return bool(self._valid[record_id])
 
+    def lookup(self, value: str, field: str = 'pid') -> List[Tuple[Dict[str, str], bool]]:
+        '''
+        Find the passports with the given value for an indexed field
+
+
+        Arguments
+        ---------
+
+        value       value to look up
+
+        Optional Arguments
+        ------------------
+
+        field       indexed field to search, default is the passport ID
+
+
+        Returns
+        -------
+
+        List of (passport data, validity) pairs for every matching passport
+
+        '''
+        if field not in self.indices:
+            raise KeyError(f"Field '{field}' is not indexed, indexed fields are {list(self.indices)}")
+
+        return [(self.records[i], self.is_valid(i)) for i in self.indices[field].get(value, [])]
+
+
+def passport_columns(passports: Iterable[Dict[str, str]], fields: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    '''
+    Store passport records as columns, one per field, with missing values as NaN
+    so that field presence is given by a mask
+
+
+    Arguments
+    ---------
+
+    passports       passport dictionaries, e.g. from iter_passport_data
+
+    Optional Arguments
+    ------------------
+
+    fields          fields to keep as columns, default is those of PASSPORT_SCHEMA
+
+
+    Returns
+    -------
+
+    DataFrame with one row per passport and one object column per field
+
+    '''
+    _fields = list(PASSPORT_SCHEMA if fields is None else fields)
+    _records = ([p.get(f) for f in _fields] for p in passports)
+    return pd.DataFrame(_records, columns=_fields, dtype=object)
+
+
+def _evaluate_column(column: pd.Series, field: str, spec: Dict[str, Any]) -> np.ndarray:
+    '''
+    Evaluate the rule of a single schema field across a column of values at once
+
+
+    Arguments
+    ---------
+
+    column      passport values for the field, NaN where missing
+    field       name of the field
+    spec        schema entry for the field as for compile_validation_plan
+
+
+    Returns
+    -------
+
+    Boolean array, True where the value is present and satisfies the rule
+
+    '''
+    _rule_keys = [k for k in ('range', 'units', 'pattern', 'choices') if k in spec]
+
+    if len(_rule_keys) != 1:
+        raise ValueError(f"Schema entry for '{field}' must have exactly one rule, got {_rule_keys}")
+
+    _present = column.notna().to_numpy()
+
+    if 'choices' in spec:
+        return _present & column.isin(frozenset(spec['choices'])).to_numpy()
+
+    _values = column.where(column.notna(), '').astype(str)
+
+    if 'pattern' in spec:
+        return _present & _values.str.fullmatch(spec['pattern'], case=False).to_numpy(dtype=bool)
+
+    if 'range' in spec:
+        _lo, _hi = (int(i) for i in spec['range'])
+        _numbers = pd.to_numeric(_values.where(_values.str.fullmatch(r'[0-9]+')), errors='coerce')
+        return _present & _numbers.between(_lo, _hi).to_numpy(dtype=bool)
+
+    _valid = np.zeros(len(column), dtype=bool)
+    _decided = np.zeros(len(column), dtype=bool)
+
+    for unit, (lo, hi) in spec['units'].items():
+        _numbers = pd.to_numeric(
+            _values.str.extract(r'([0-9]+)' + re.escape(unit), flags=re.IGNORECASE)[0], errors='coerce'
+        )
+        _found = _numbers.notna().to_numpy() & ~_decided
+        _valid |= _found & _numbers.between(int(lo), int(hi)).to_numpy(dtype=bool)
+        _decided |= _found
+
+    return _present & _valid
+
+
+def evaluate_passport_columns(columns: pd.DataFrame,
+                              schema: Dict[str, Dict[str, Any]] = PASSPORT_SCHEMA) -> pd.DataFrame:
+    '''
+    Check every field of a columnar passport store against a schema with
+    vectorized operations, a whole batch at a time
+
+
+    Arguments
+    ---------
+
+    columns     columnar passport data as returned by passport_columns
+
+    Optional Arguments
+    ------------------
+
+    schema      passport schema as for compile_validation_plan, default is
+                PASSPORT_SCHEMA
+
+
+    Returns
+    -------
+
+    Boolean DataFrame with a column per schema field, True where the field is
+    present and valid. A passport is valid if its whole row is True.
+
+    '''
+    _missing = [f for f in schema if f not in columns]
+    _results = {}
+
+    for field, spec in schema.items():
+        if field in _missing:
+            _results[field] = np.zeros(len(columns), dtype=bool)
+        else:
+            _results[field] = _evaluate_column(columns[field], field, spec)
+
+    return pd.DataFrame(_results, index=columns.index)
+
+
+def _record_aligned_ranges(input_file: str, chunk_size: int) -> List[Tuple[int, int]]:
+    '''
+    Split a passport file into byte ranges of roughly the given size, with each
+    boundary moved forward to just after the next blank line so no record is divided
+
+
+    Arguments
+    ---------
+
+    input_file      address of the file to split
+    chunk_size      target number of bytes per range
+
+
+    Returns
+    -------
+
+    List of (start, end) byte offsets covering the whole file
+
+    '''
+    _file_size = os.path.getsize(input_file)
+    _boundaries = [0]
+
+    with open(input_file, 'rb') as f:
+        while _boundaries[-1] + chunk_size < _file_size:
+            f.seek(_boundaries[-1] + chunk_size)
+            f.readline()
+            for line in iter(f.readline, b''):
+                if not line.strip():
+                    break
+            if f.tell() >= _file_size:
+                break
+            _boundaries.append(f.tell())
+
+    _boundaries.append(_file_size)
+
+    return list(zip(_boundaries[:-1], _boundaries[1:]))
+
+
+_WORKER_PLAN: List[Tuple[str, Callable[[str], bool]]] = []
+
+
+def _init_validation_worker(schema: Dict[str, Dict[str, Any]]) -> None:
+    '''Compile the validation plan once per worker process'''
+    global _WORKER_PLAN
+    _WORKER_PLAN = compile_validation_plan(schema)
+
+
+def _validate_file_range(input_file: str, start: int, end: int) -> Tuple[int, int, Dict[str, int]]:
+    '''Validate the passports within a byte range of a file using the worker plan'''
+    with open(input_file, 'rb') as f:
+        f.seek(start)
+        _text = f.read(end - start).decode()
+
+    _n_valid = 0
+    _n_total = 0
+    _failures = {field: 0 for field, _ in _WORKER_PLAN}
+
+    for passport in iter_passport_data(io.StringIO(_text)):
+        _n_total += 1
+        _valid = True
+        for field, check in _WORKER_PLAN:
+            if field not in passport or not check(passport[field]):
+                _failures[field] += 1
+                _valid = False
+        _n_valid += _valid
+
+    return _n_valid, _n_total, _failures
+
+
+def validate_passport_file_parallel(input_file: str, schema: Dict[str, Dict[str, Any]] = PASSPORT_SCHEMA,
+                                    n_workers: Optional[int] = None,
+                                    chunk_size: int = 16 * 1024**2) -> Dict[str, Any]:
+    '''
+    Validate a passport file across a pool of processes, each extracting and
+    validating the passports within record aligned byte ranges of the file
+
+
+    Arguments
+    ---------
+
+    input_file      data file containing list of passports
+
+    Optional Arguments
+    ------------------
+
+    schema          passport schema as for compile_validation_plan, compiled once
+                    per worker. Default is PASSPORT_SCHEMA.
+    n_workers       number of worker processes, default is the number of CPUs
+    chunk_size      target number of bytes read by a worker at a time
+
+
+    Returns
+    -------
+
+    Dictionary containing the number of valid passports ('valid'), the total
+    number of passports ('total') and the number of passports failing each
+    field, whether missing or invalid ('field_failures')
+
+    '''
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Failed to read passport data file '{input_file}'")
+
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+
+    _results: Dict[str, Any] = {'valid': 0, 'total': 0, 'field_failures': {f: 0 for f in schema}}
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_validation_worker,
+                             initargs=(schema,)) as executor:
+        _futures = [
+            executor.submit(_validate_file_range, input_file, *r)
+            for r in _record_aligned_ranges(input_file, chunk_size)
+        ]
+        for future in _futures:
+            _n_valid, _n_total, _failures = future.result()
+            _results['valid'] += _n_valid
+            _results['total'] += _n_total
+            for field, n in _failures.items():
+                _results['field_failures'][field] += n
+
+    return _results
+
+
+if __name__ in "__main__":
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'data.txt')
 
     _passport_data = read_passport_data(DATA_FILE)
 
-    _validator = lambda p : passport_validator(p, REQUIRED_FIELDS)
+    _plan = compile_validation_plan(PASSPORT_SCHEMA)
+
+    _validator = lambda p : validate_passport(p, _plan)
 
     _n_valid = sum(_validator(i) for i in _passport_data)
     
@@ -8,7 +8,10 @@
 #############################################################################################
 
 import os
-from typing import Dict, List, Callable, Optional, Tuple
+import numpy as np
+from typing import Dict, Iterable, List, Callable, Optional, Set, Tuple
+
+_SEAT_CODE_BITS = str.maketrans('FBLR', '0101')
 
 
 def binary_search(search_str: str, delimiter_char: str) -> int:
@@ -29,14 +32,8 @@ def binary_search(search_str: str, delimiter_char: str) -> int:
     Integer matching search result
 
     '''
-    _numbers = [i for i in range(0, 2**len(search_str))]
-    for char in list(search_str):
-        _mid_point = int(len(_numbers)/2)
-        if char == delimiter_char:
-            _numbers = _numbers[:_mid_point]
-        else:
-            _numbers = _numbers[_mid_point:]
-    return _numbers[0]
+    _bits = ''.join('0' if char == delimiter_char else '1' for char in search_str)
+    return int(_bits or '0', 2)
 
 
 def get_row(row_str: str):
@@ -57,7 +54,9 @@ def process_seat_code(seat_binary_str: str) -> Tuple[int, int]:
     Arguments
     ---------
 
-    seat_binary_str     seat search string in the form 7*[F|B]+3*[L|R]
+    seat_binary_str     seat search string in the form 7*[F|B]+3*[L|R], which read
+                        as a binary number with F, L as 0 and B, R as 1 gives the
+                        row followed by the column
 
     Returns
     -------
@@ -65,11 +64,10 @@ def process_seat_code(seat_binary_str: str) -> Tuple[int, int]:
     Tuple containing integer ID for the row and column
 
     '''
-    _row_str = [i for i in list(seat_binary_str) if i in ['F', 'B']]
-    _col_str = [i for i in list(seat_binary_str) if i in ['R', 'L']]
-    r = get_row(_row_str)
-    c = get_col(_col_str)
-    return r, c
+    _code = seat_binary_str.strip()
+    _n_col_bits = len(_code) - len(_code.rstrip('LR'))
+    _seat = int(_code.translate(_SEAT_CODE_BITS), 2)
+    return _seat >> _n_col_bits, _seat & ((1 << _n_col_bits) - 1)
 
 
 def get_seat_id(row: int, col: int, calc_func: Optional[Callable]=None) -> int:
@@ -133,6 +131,69 @@ def get_allocations_as_dict(input_file: str) -> Dict[int, List[int]]:
     return _allocated
 
 
+def decode_seat_ids(input_file: str, code_length: Optional[int] = None) -> np.ndarray:
+    '''
+    Decode the seat IDs for every seat code in a file at once, viewing the file
+    as a matrix of characters with one line per row and taking the dot product
+    of its code columns with powers of two. Lines may end in LF or CRLF and the
+    final line terminator is optional.
+
+
+    Arguments
+    ---------
+
+    input_file      string address of input file
+
+    Optional Arguments
+    ------------------
+
+    code_length     expected number of characters in each seat code
+
+    Returns
+    -------
+
+    Array of seat IDs in file order, which for codes of 3 column characters are
+    equal to 8*r+c
+
+    '''
+
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Could not find file '{input_file}'")
+
+    _raw = np.fromfile(input_file, dtype=np.uint8)
+
+    if not _raw.size:
+        return np.empty(0, dtype=np.int64)
+
+    # Every line has the same width, so the first line gives the code length
+    # and the line terminator for the whole file
+    _line_end = int(np.argmax(_raw == ord('\n')))
+    if _raw[_line_end] != ord('\n'):
+        _line_end = _raw.size
+    _terminator = b'\r\n' if _line_end and _raw[_line_end - 1] == ord('\r') else b'\n'
+
+    if code_length is None:
+        code_length = _line_end - len(_terminator) + 1
+
+    if _raw[-len(_terminator):].tobytes() != _terminator:
+        _raw = np.concatenate((_raw, np.frombuffer(_terminator, dtype=np.uint8)))
+
+    _width = code_length + len(_terminator)
+
+    if code_length < 1 or _raw.size % _width:
+        raise AssertionError(f"Seat codes in '{input_file}' are not all of length {code_length}")
+
+    _rows = _raw.reshape(-1, _width)
+
+    if not (_rows[:, code_length:] == np.frombuffer(_terminator, dtype=np.uint8)).all():
+        raise AssertionError(f"Seat codes in '{input_file}' are not all of length {code_length}")
+
+    _matrix = _rows[:, :code_length]
+    _bits = ((_matrix == ord('B')) | (_matrix == ord('R'))).astype(np.int64)
+
+    return _bits @ (1 << np.arange(code_length - 1, -1, -1, dtype=np.int64))
+
+
 def get_highest_booked_seat_id(bookings_dict: Dict[int, List[int]]) -> int:
     '''
     Get the seat ID for the highest numbered booked seat on the plane
@@ -183,6 +244,211 @@ def find_unallocated_seat(allocations_dict: Dict[int, List[int]], expected_n_col
     raise AssertionError(f"Failed to find unoccupied seat ID")
 
 
+def seat_occupancy(seat_ids: Iterable[int], n_row_bits: int = 7, n_col_bits: int = 3) -> np.ndarray:
+    '''
+    Create an occupancy map over every seat ID of an aircraft
+
+
+    Arguments
+    ---------
+
+    seat_ids        IDs of the booked seats, row*2**n_col_bits + column
+
+    Optional Arguments
+    ------------------
+
+    n_row_bits      number of row characters within a seat code
+    n_col_bits      number of column characters within a seat code
+
+    Returns
+    -------
+
+    Boolean array indexed by seat ID, True where the seat is booked
+
+    '''
+    _seat_ids = np.fromiter(seat_ids, dtype=np.int64)
+    _n_seats = 1 << (n_row_bits + n_col_bits)
+
+    if _seat_ids.size and (_seat_ids.min() < 0 or _seat_ids.max() >= _n_seats):
+        raise ValueError(f"Seat IDs must lie within 0-{_n_seats-1} for {n_row_bits} row and {n_col_bits} column bits")
+
+    _occupancy = np.zeros(_n_seats, dtype=bool)
+    _occupancy[_seat_ids] = True
+
+    return _occupancy
+
+
+def get_occupancy_from_file(input_file: str, n_row_bits: int = 7, n_col_bits: int = 3) -> np.ndarray:
+    '''
+    Create an occupancy map from a file of seat codes
+
+
+    Arguments
+    ---------
+
+    input_file      string address of input file
+
+    Optional Arguments
+    ------------------
+
+    n_row_bits      number of row characters within a seat code
+    n_col_bits      number of column characters within a seat code
+
+    Returns
+    -------
+
+    Boolean array indexed by seat ID, True where the seat is booked
+
+    '''
+    _seat_ids = decode_seat_ids(input_file, n_row_bits + n_col_bits)
+    return seat_occupancy(_seat_ids, n_row_bits, n_col_bits)
+
+
+def get_highest_occupied_seat_id(occupancy: np.ndarray) -> int:
+    '''Get the highest booked seat ID from an occupancy map'''
+    _occupied = np.flatnonzero(occupancy)
+
+    if not _occupied.size:
+        raise AssertionError(f"No seats are booked")
+
+    return int(_occupied[-1])
+
+
+def get_free_seat_ids(occupancy: np.ndarray, between_booked: bool = False) -> np.ndarray:
+    '''
+    Get the IDs of seats which are not booked
+
+
+    Arguments
+    ---------
+
+    occupancy       boolean occupancy map as returned by seat_occupancy
+
+    Optional Arguments
+    ------------------
+
+    between_booked  only return free seats whose neighbouring seat IDs on both
+                    sides are booked
+
+    Returns
+    -------
+
+    Array of free seat IDs in ascending order
+
+    '''
+    _free = ~occupancy
+
+    if between_booked:
+        _neighbours_booked = np.zeros_like(occupancy)
+        _neighbours_booked[1:-1] = occupancy[:-2] & occupancy[2:]
+        _free &= _neighbours_booked
+
+    return np.flatnonzero(_free)
+
+
+class BookingIndex:
+    '''
+    Incrementally maintained seat allocation index, backed by a segment tree of
+    booked seat counts over seat IDs, supporting bookings and cancellations in
+    O(log n) and answering highest booked and lowest free seat queries in O(log n)
+
+
+    Optional Arguments
+    ------------------
+
+    n_row_bits      number of row characters within a seat code
+    n_col_bits      number of column characters within a seat code
+
+    '''
+    def __init__(self, n_row_bits: int = 7, n_col_bits: int = 3) -> None:
+        self.n_seats = 1 << (n_row_bits + n_col_bits)
+        self._booked_counts = [0] * (2 * self.n_seats)
+        self._between_booked: Set[int] = set()
+
+    @classmethod
+    def from_file(cls, input_file: str, n_row_bits: int = 7, n_col_bits: int = 3) -> 'BookingIndex':
+        '''Create an index holding the bookings for every seat code within a file'''
+        _index = cls(n_row_bits, n_col_bits)
+        for seat_id in decode_seat_ids(input_file, n_row_bits + n_col_bits).tolist():
+            _index.book(seat_id)
+        return _index
+
+    @property
+    def n_booked(self) -> int:
+        return self._booked_counts[1]
+
+    @property
+    def n_free(self) -> int:
+        return self.n_seats - self.n_booked
+
+    def is_booked(self, seat_id: int) -> bool:
+        self._check_seat_id(seat_id)
+        return bool(self._booked_counts[self.n_seats + seat_id])
+
+    def _check_seat_id(self, seat_id: int) -> None:
+        if not 0 <= seat_id < self.n_seats:
+            raise ValueError(f"Seat ID {seat_id} outside of range 0-{self.n_seats-1}")
+
+    def _set(self, seat_id: int, booked: bool) -> None:
+        _node = self.n_seats + seat_id
+        self._booked_counts[_node] = int(booked)
+        _node //= 2
+        while _node:
+            self._booked_counts[_node] = self._booked_counts[2*_node] + self._booked_counts[2*_node + 1]
+            _node //= 2
+
+        # Only the seat and its direct neighbours can change their gap status, their
+        # leaves being read directly as the seat IDs are bounds checked here
+        _leaves, _offset = self._booked_counts, self.n_seats
+        for seat in (seat_id - 1, seat_id, seat_id + 1):
+            if 0 < seat < self.n_seats - 1 and not _leaves[_offset + seat] \
+                    and _leaves[_offset + seat - 1] and _leaves[_offset + seat + 1]:
+                self._between_booked.add(seat)
+            else:
+                self._between_booked.discard(seat)
+
+    def book(self, seat_id: int) -> None:
+        '''Book the seat with the given ID'''
+        self._check_seat_id(seat_id)
+        if self.is_booked(seat_id):
+            raise ValueError(f"Seat ID {seat_id} is already booked")
+        self._set(seat_id, True)
+
+    def cancel(self, seat_id: int) -> None:
+        '''Cancel the booking for the seat with the given ID'''
+        self._check_seat_id(seat_id)
+        if not self.is_booked(seat_id):
+            raise ValueError(f"Seat ID {seat_id} is not booked")
+        self._set(seat_id, False)
+
+    def get_highest_booked_seat_id(self) -> int:
+        '''Get the highest booked seat ID by descending the rightmost booked branch'''
+        if not self.n_booked:
+            raise AssertionError(f"No seats are booked")
+
+        _node = 1
+        while _node < self.n_seats:
+            _node = 2*_node + 1 if self._booked_counts[2*_node + 1] else 2*_node
+
+        return _node - self.n_seats
+
+    def get_lowest_free_seat_id(self) -> int:
+        '''Get the lowest free seat ID by descending the leftmost branch with a free seat'''
+        if not self.n_free:
+            raise AssertionError(f"All seats are booked")
+
+        _node, _width = 1, self.n_seats
+        while _node < self.n_seats:
+            _width //= 2
+            _node = 2*_node if self._booked_counts[2*_node] < _width else 2*_node + 1
+
+        return _node - self.n_seats
+
+    def get_free_seats_between_booked(self) -> List[int]:
+        '''Get the free seat IDs whose neighbouring seat IDs on both sides are booked'''
+        return sorted(self._between_booked)
+
+
 if __name__ in "__main__":
     DATA_FILE = os.path.join(os.path.dirname(__file__), 'data.txt')
 
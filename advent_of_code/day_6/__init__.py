@@ -7,8 +7,47 @@
 #                                                                                           #
 #############################################################################################
 
+import mmap
 import os
-from typing import List, Tuple
+import re
+from functools import reduce
+from concurrent.futures import ProcessPoolExecutor
+from operator import and_
+from string import ascii_lowercase
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+_ANSWER_BITS = {c: 1 << i for i, c in enumerate(ascii_lowercase)}
+ALL_ANSWERS_MASK = (1 << len(ascii_lowercase)) - 1
+_GROUP_SEPARATOR = re.compile(r'\n[ \t\r]*\n')
+_GROUP_SEPARATOR_BYTES = re.compile(rb'\n[ \t\r]*\n')
+
+
+def answer_mask(answers: str) -> int:
+    '''
+    Encode the questions answered 'yes' as a 26-bit integer, bit i being set if
+    the i-th letter of the alphabet is present. Other characters are ignored.
+
+
+    Arguments
+    ---------
+
+    answers         string of questions answered 'yes'
+
+    Returns
+    -------
+
+    Integer mask of the questions answered
+
+    '''
+    _mask = 0
+    for char in answers:
+        _mask |= _ANSWER_BITS.get(char, 0)
+    return _mask
+
+
+def popcount(mask: int) -> int:
+    '''Count the number of set bits within an integer mask'''
+    return bin(mask).count('1')
 
 
 def num_yes_questions_for_group_or(input_str: str) -> int:
@@ -28,7 +67,7 @@ def num_yes_questions_for_group_or(input_str: str) -> int:
     Number of questions to which at least one group member answered 'yes'
 
     '''
-    return len(set(list(input_str.strip())))
+    return popcount(answer_mask(input_str))
 
 def num_yes_questions_for_group_and(input_str_list: List[str]) -> int:
     '''
@@ -48,14 +87,13 @@ def num_yes_questions_for_group_and(input_str_list: List[str]) -> int:
 
     '''
 
-    _all_chars = set(list(''.join(input_str_list)))
-
-    _answered_yes_by_group = [i for i in _all_chars if sum(i in j for j in input_str_list) == len(input_str_list)]
+    if not input_str_list:
+        return 0
 
-    return len(_answered_yes_by_group)
+    return popcount(reduce(and_, (answer_mask(i) for i in input_str_list), ALL_ANSWERS_MASK))
 
 
-def get_totals_from_lines(input_lines: List[str]) -> Tuple[int, int]:
+def get_totals_from_lines(input_lines: Iterable[str]) -> Tuple[int, int]:
     '''
     For the given string input lines return the total number of questions
     for which at least person answered 'yes', and the total number of questions
@@ -65,7 +103,8 @@ def get_totals_from_lines(input_lines: List[str]) -> Tuple[int, int]:
     Arguments
     ---------
 
-    input_lines     list of strings which are lines of the input file
+    input_lines     lines of the input file, any iterable of strings, groups
+                    being reduced to 26-bit answer masks as they are read
 
     Returns
     -------
@@ -77,31 +116,205 @@ def get_totals_from_lines(input_lines: List[str]) -> Tuple[int, int]:
     '''
     _counter_or = 0
     _counter_and = 0
-    _group = []
-
-    for i, line in enumerate(input_lines):
-        if not line.strip():
-            _counter_or += num_yes_questions_for_group_or(''.join(_group))
-            _counter_and += num_yes_questions_for_group_and(_group)
-            _group = []
-        elif i == len(input_lines)-1 and line.strip():
-            _group.append(line.strip())
-            _counter_or += num_yes_questions_for_group_or(''.join(_group))
-            _counter_and += num_yes_questions_for_group_and(_group)
-        else:
-            _group.append(line.strip())
+    _mask_or = 0
+    _mask_and = ALL_ANSWERS_MASK
+    _in_group = False
+
+    for line in input_lines:
+        _line = line.strip()
+        if _line:
+            _mask = answer_mask(_line)
+            _mask_or |= _mask
+            _mask_and &= _mask
+            _in_group = True
+        elif _in_group:
+            _counter_or += popcount(_mask_or)
+            _counter_and += popcount(_mask_and)
+            _mask_or, _mask_and, _in_group = 0, ALL_ANSWERS_MASK, False
+
+    if _in_group:
+        _counter_or += popcount(_mask_or)
+        _counter_and += popcount(_mask_and)
 
     return _counter_or, _counter_and
 
 
-def get_total_for_flight(input_file: str) -> Tuple[int, int]:
+def iter_groups(survey_file: TextIO, buffer_size: int = 64*1024) -> Iterator[List[str]]:
+    '''
+    Lazily read groups from an open survey file, yielding each one as soon as the
+    blank line ending it (or the end of the file) is reached
+
+
+    Arguments
+    ---------
+
+    survey_file     open text file handle of survey answers
+
+    Optional Arguments
+    ------------------
+
+    buffer_size     number of characters read from the file at a time
+
+    Returns
+    -------
+
+    Generator of lists of the answers given by each member of a group
+
+    '''
+    _buffer = ''
+
+    for chunk in iter(lambda: survey_file.read(buffer_size), ''):
+        _blocks = _GROUP_SEPARATOR.split(_buffer + chunk)
+        _buffer = _blocks.pop()
+        for block in _blocks:
+            if block.split():
+                yield block.split()
+
+    if _buffer.split():
+        yield _buffer.split()
+
+
+def get_totals_from_groups(groups: Iterable[List[str]]) -> Tuple[int, int]:
+    '''
+    For the given groups return the total number of questions for which at least
+    one person answered 'yes', and the total for which all people answered 'yes'
+
+
+    Arguments
+    ---------
+
+    groups          lists of the answers given by each member of a group, e.g.
+                    from iter_groups
+
+    Returns
+    -------
+
+    A tuple containing the two totals for:
+        - At least one answered yes
+        - All answered yes
+
+    '''
+    _counter_or = 0
+    _counter_and = 0
+
+    for group in groups:
+        if not group:
+            continue
+        _mask_or = 0
+        _mask_and = ALL_ANSWERS_MASK
+        for answers in group:
+            _mask = answer_mask(answers)
+            _mask_or |= _mask
+            _mask_and &= _mask
+        _counter_or += popcount(_mask_or)
+        _counter_and += popcount(_mask_and)
+
+    return _counter_or, _counter_and
+
+
+def _group_aligned_ranges(input_file: str, chunk_size: int) -> List[Tuple[int, int]]:
+    '''
+    Split a survey file into byte ranges of roughly the given size, each boundary
+    placed just after the next group separating blank line found by searching a
+    memory map of the file
+
+
+    Arguments
+    ---------
+
+    input_file      address of the file to split
+    chunk_size      target number of bytes per range
+
+    Returns
+    -------
+
+    List of (start, end) byte offsets covering the whole file
+
+    '''
+    _file_size = os.path.getsize(input_file)
+
+    if not _file_size:
+        return []
+
+    _boundaries = [0]
+
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while _boundaries[-1] + chunk_size < _file_size:
+            _separator = _GROUP_SEPARATOR_BYTES.search(mm, _boundaries[-1] + chunk_size)
+            if not _separator:
+                break
+            _boundaries.append(_separator.end())
+
+    _boundaries.append(_file_size)
+
+    return list(zip(_boundaries[:-1], _boundaries[1:]))
+
+
+def _totals_for_file_range(input_file: str, start: int, end: int) -> Tuple[int, int]:
+    '''Get the survey totals for the groups within a byte range of a file'''
+    with open(input_file, 'rb') as f:
+        f.seek(start)
+        _text = f.read(end - start).decode()
+
+    return get_totals_from_lines(_text.split('\n'))
+
+
+def get_total_for_flight_parallel(input_file: str, n_workers: Optional[int] = None,
+                                  chunk_size: int = 16 * 1024**2) -> Tuple[int, int]:
+    '''
+    Get the survey totals for a flight across a pool of processes, each counting
+    the groups within group aligned byte ranges of the file
+
+
+    Arguments
+    ---------
+
+    input_file      address of the survey file
+
+    Optional Arguments
+    ------------------
+
+    n_workers       number of worker processes, default is the number of CPUs
+    chunk_size      target number of bytes read by a worker at a time
+
+    Returns
+    -------
+
+    A tuple containing the two totals for:
+        - At least one answered yes
+        - All answered yes
+
+    '''
 
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Could not find file '{input_file}'")
 
-    lines = open(input_file).readlines()
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+
+    _counter_or = 0
+    _counter_and = 0
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        _futures = [
+            executor.submit(_totals_for_file_range, input_file, *r)
+            for r in _group_aligned_ranges(input_file, chunk_size)
+        ]
+        for future in _futures:
+            _total_or, _total_and = future.result()
+            _counter_or += _total_or
+            _counter_and += _total_and
+
+    return _counter_or, _counter_and
+
+
+def get_total_for_flight(input_file: str) -> Tuple[int, int]:
+
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Could not find file '{input_file}'")
 
-    return get_totals_from_lines(lines)
+    with open(input_file) as f:
+        return get_totals_from_lines(f)
 
 
 if __name__ in "__main__":
@@ -1,8 +1,12 @@
 import pytest
 import os
 from functools import reduce
+from itertools import combinations
+from collections import Counter
 from operator import mul
-from advent_of_code.day_1 import get_numbers_totalling_N, tidy_data
+from advent_of_code.day_1 import (get_numbers_totalling_N, tidy_data, SubsetSumIndex,
+                                  iter_numbers_totalling_N, count_numbers_totalling_N,
+                                  stream_numbers_totalling_N)
 
 
 @pytest.fixture
@@ -22,3 +26,57 @@ def test_prod_of_3_nums_that_sum_to(data_set):
     nums = get_numbers_totalling_N(data_set, 2020, 3)
     assert reduce(mul, nums, 1) == 241861950
 
+
+
+@pytest.mark.day1
+def test_k_sum_matches_brute_force():
+    assert get_numbers_totalling_N([3, 1, 2, 0], 3, 2) == (3, 0)
+    numbers = [12, 3, 7, 3, 19, 1, 8, 5, 11, 2]
+    for n in range(0, 6):
+        for total in range(0, 60):
+            expected = next((c for c in combinations(numbers, n) if sum(c) == total), None)
+            if expected is None:
+                with pytest.raises(ValueError):
+                    get_numbers_totalling_N(numbers, total, n)
+            else:
+                assert get_numbers_totalling_N(numbers, total, n) == expected
+
+
+@pytest.mark.day1
+@pytest.mark.parametrize('pair_sums', [False, True])
+def test_index_many_totals(data_set, pair_sums):
+    index = SubsetSumIndex(data_set, pair_sums=pair_sums)
+    for n in (2, 3):
+        totals = list(range(1900, 2100))
+        found = index.find_many(totals, n)
+        assert set(found) == set(totals)
+        for total, subset in found.items():
+            expected = next((c for c in combinations(data_set, n) if sum(c) == total), None)
+            assert (subset is None) == (expected is None)
+            if subset is not None:
+                assert sum(subset) == total and not Counter(subset) - Counter(data_set)
+    assert reduce(mul, index.find(2020, 3), 1) == 241861950
+
+
+@pytest.mark.day1
+def test_all_solutions_match_combinations():
+    numbers = [5, 3, 5, 1, 2, 5, 4, 0, 3, 6]
+    for n in range(0, 7):
+        for total in range(0, 30):
+            expected = sorted(c for c in combinations(numbers, n) if sum(c) == total)
+            assert sorted(iter_numbers_totalling_N(numbers, total, n)) == expected
+            assert count_numbers_totalling_N(numbers, total, n) == len(expected)
+
+
+@pytest.mark.day1
+def test_streaming_stops_once_found():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_1.dat')
+    with open(DATA_FILE) as f:
+        found = list(stream_numbers_totalling_N(f, 2020, find_triple=True))
+    assert sorted(reduce(mul, i, 1) for i in found) == [514579, 241861950]
+
+    def feed():
+        yield from ['1010\n', '\n', '10\n', '1010\n']
+        raise AssertionError("Feed read beyond the first pair")
+
+    assert next(stream_numbers_totalling_N(feed(), 2020)) == (1010, 1010)
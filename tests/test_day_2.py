@@ -1,6 +1,7 @@
 import pytest
 import os
-from advent_of_code.day_2 import process_file
+from advent_of_code.day_2 import (process_file, process_file_vectorized, unpack_result_bits,
+                                  process_file_parallel, PolicyRegistry)
 
 
 @pytest.fixture
@@ -18,3 +19,85 @@ def test_sled_rental_pwd_check(processed_data):
 def test_toboggan_rental_pwd_check(processed_data):
     assert processed_data["toboggan"]["num"] == 1
 
+
+
+@pytest.mark.day2
+def test_vectorized_matches_line_by_line():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_2', 'data.txt')
+    for data_file in (os.path.join(os.path.dirname(__file__), 'day_2.dat'), DATA_FILE):
+        expected = process_file(data_file)
+        vectorized = process_file_vectorized(data_file)
+        for policy in ('sled', 'toboggan'):
+            assert vectorized[policy]['num'] == expected[policy]['num']
+            assert vectorized[policy]['denom'] == expected[policy]['denom']
+            assert list(vectorized[policy]['list']) == expected[policy]['list']
+
+
+@pytest.mark.day2
+@pytest.mark.parametrize('process', [process_file, process_file_vectorized])
+def test_low_memory_results_modes(processed_data, process):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_2.dat')
+    counters = process(DATA_FILE, results_mode='count')
+    packed = process(DATA_FILE, results_mode='bits')
+    for policy in ('sled', 'toboggan'):
+        assert 'list' not in counters[policy] and 'bits' not in counters[policy]
+        assert counters[policy]['num'] == processed_data[policy]['num']
+        assert len(packed[policy]['bits']) == 1
+        assert unpack_result_bits(packed[policy]['bits'], 3) == processed_data[policy]['list']
+
+
+@pytest.mark.day2
+@pytest.mark.parametrize('chunk_size', [1, 7, 1024])
+def test_parallel_chunked_counts(processed_data, chunk_size):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_2.dat')
+    results = process_file_parallel(DATA_FILE, n_workers=2, chunk_size=chunk_size)
+    for policy in ('sled', 'toboggan'):
+        assert results[policy]['num'] == processed_data[policy]['num']
+        assert results[policy]['denom'] == 3
+
+
+@pytest.mark.day2
+def test_policy_registry_single_pass(processed_data):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_2.dat')
+    registry = PolicyRegistry()
+
+    @registry.register('short')
+    def short_password(columns):
+        return (columns['password'] != 0).sum(axis=1) <= 5
+
+    results = registry.process_file(DATA_FILE)
+    assert registry.policies == ['sled', 'toboggan', 'short']
+    for policy in ('sled', 'toboggan'):
+        assert results[policy]['num'] == processed_data[policy]['num']
+    assert results['short']['num'] == 2
+    assert registry.stats['short']['denom'] == 3
+    assert all(s['time'] >= 0 for s in registry.stats.values())
+    assert 'short' in registry.report()
+
+    with pytest.raises(KeyError):
+        registry.register('sled', short_password)
+
+
+@pytest.mark.day2
+@pytest.mark.parametrize('process', [
+    process_file, process_file_vectorized, process_file_parallel,
+    lambda f: PolicyRegistry().process_file(f)
+])
+def test_malformed_line_raises(tmp_path, process):
+    data_file = tmp_path / 'day_2_malformed.dat'
+    data_file.write_text('1-3 a: abcde\n1-3 b cdefg\n2-9 c: ccccccccc\n')
+    with pytest.raises(ValueError):
+        process(str(data_file))
+
+
+@pytest.mark.day2
+@pytest.mark.parametrize('process', [
+    process_file, process_file_vectorized, process_file_parallel,
+    lambda f: PolicyRegistry().process_file(f)
+])
+@pytest.mark.parametrize('entry', ['0-3 a: abcde', '1-6 a: abcde', '3-1 b: bb', '1-1 c: '])
+def test_out_of_range_position_raises(tmp_path, process, entry):
+    data_file = tmp_path / 'day_2_out_of_range.dat'
+    data_file.write_text(f'1-3 a: abcde\n{entry}\n2-9 c: ccccccccc\n')
+    with pytest.raises(ValueError, match=None if process is process_file else 'line 2'):
+        process(str(data_file))
@@ -2,7 +2,9 @@ import os
 import pytest
 from functools import reduce
 from operator import mul
-from advent_of_code.day_3 import map_dataframe, travel_down_slope, df_count_char
+from advent_of_code.day_3 import (map_dataframe, travel_down_slope, df_count_char, map_array, count_trees,
+                                  count_trees_many, count_trees_streaming, find_best_gradients,
+                                  map_terrain, terrain_histograms, render_route, ROUTE_COLOURS)
 
 
 GRADIENTS = [(3, 1), (1, 1), (5, 1), (7, 1), (1, 2)]
@@ -25,3 +27,102 @@ def test_product_many_routes(data_set):
     n = [df_count_char(df, 'X') for df in dfs]
     assert reduce(mul, n, 1) == 336
 
+
+
+@pytest.mark.day3
+def test_tree_bitmap_matches_dataframe(data_set):
+    tree_map = map_array(os.path.join(os.path.dirname(__file__), 'day_3.dat'))
+    assert tree_map.shape == data_set.shape
+    n = [count_trees(tree_map, i) for i in GRADIENTS]
+    assert n[0] == 7
+    assert reduce(mul, n, 1) == 336
+
+
+@pytest.mark.day3
+def test_many_gradients_single_pass():
+    tree_map = map_array(os.path.join(os.path.dirname(__file__), 'day_3.dat'))
+    counts, product = count_trees_many(tree_map, GRADIENTS)
+    assert counts[(3, 1)] == 7 and product == 336
+
+    counts, product = count_trees_many(tree_map, [(3, 1), (3, 1)])
+    assert counts == {(3, 1): 7} and product == 49
+
+    gradients = [(dx, dy) for dx in range(0, 25) for dy in range(1, 13)]
+    counts, _ = count_trees_many(tree_map, gradients, start_pos=(1, 2))
+    assert counts == {g: count_trees(tree_map, g, (1, 2)) for g in gradients}
+
+
+@pytest.mark.day3
+def test_streaming_traversal(tmp_path):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_3.dat')
+    tree_map = map_array(DATA_FILE)
+    gradients = GRADIENTS + [(0, 3), (13, 4), (2, 11)]
+
+    crlf_file = tmp_path / 'day_3_crlf.dat'
+    crlf_file.write_bytes(open(DATA_FILE, 'rb').read().rstrip().replace(b'\n', b'\r\n'))
+
+    for gradient in gradients:
+        for data_file in (DATA_FILE, str(crlf_file)):
+            assert count_trees_streaming(data_file, gradient) == count_trees(tree_map, gradient)
+
+    ragged_file = tmp_path / 'day_3_ragged.dat'
+    ragged_file.write_text('..#\n.#\n#..\n')
+    with pytest.raises(AssertionError):
+        count_trees_streaming(str(ragged_file), (1, 1))
+
+    for content in (b'\n..#\n#..\n', b'\r\n..#\r\n', b'\n\n', b'\r\n'):
+        ragged_file.write_bytes(content)
+        with pytest.raises(AssertionError):
+            count_trees_streaming(str(ragged_file), (1, 1))
+
+
+@pytest.mark.day3
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_best_gradient_search(n_workers):
+    tree_map = map_array(os.path.join(os.path.dirname(__file__), 'day_3.dat'))
+    dx_values, dy_values = range(0, 40), range(1, 6)
+    counts, _ = count_trees_many(tree_map, [(dx, dy) for dy in dy_values for dx in dx_values])
+    expected = sorted(counts.items(), key=lambda x: (x[1], x[0]))[:10]
+    found = find_best_gradients(tree_map, dx_values, dy_values, top_n=10, batch_size=7, n_workers=n_workers)
+    assert found == expected
+
+
+@pytest.mark.day3
+def test_terrain_histograms(tmp_path):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_3.dat')
+    terrain_map = map_terrain(DATA_FILE)
+    histograms = terrain_histograms(terrain_map, GRADIENTS, 2)
+    assert [int(histograms[g][1]) for g in GRADIENTS] == [7, 2, 3, 4, 2]
+    assert int(histograms[(1, 2)].sum()) == 6
+
+    terrain_file = tmp_path / 'day_3_terrain.dat'
+    terrain_file.write_text('.#~\n~^#\n#..\n')
+    terrain_map = map_terrain(str(terrain_file), '.#~^')
+    before = terrain_map.copy()
+    assert list(terrain_histograms(terrain_map, [(1, 1)], 4)[(1, 1)]) == [2, 0, 0, 1]
+    assert (terrain_map == before).all()
+
+    with pytest.raises(ValueError):
+        map_terrain(str(terrain_file))
+
+    # Histogram length follows the symbol count, not the symbols present in the map
+    terrain_file.write_text('..\n..\n')
+    terrain_map = map_terrain(str(terrain_file), '.#~^')
+    assert list(terrain_histograms(terrain_map, [(1, 1)], 4)[(1, 1)]) == [2, 0, 0, 0]
+
+    with pytest.raises(ValueError):
+        terrain_histograms(map_terrain(DATA_FILE), [(1, 1)], 1)
+
+
+@pytest.mark.day3
+def test_render_route_viewport(data_set):
+    tree_map = map_array(os.path.join(os.path.dirname(__file__), 'day_3.dat'))
+    travelled = travel_down_slope(data_set, GRADIENTS[0])
+    symbols = {'.': 'open', '#': 'tree', 'O': 'route_open', 'X': 'route_tree'}
+
+    for origin in [(0, 0), (3, 5), (8, 20)]:
+        rendered = render_route(tree_map, GRADIENTS[0], 6, 9, origin=origin)
+        expected = travelled.iloc[origin[0]:origin[0]+6, origin[1]:origin[1]+9]
+        assert rendered.split('\n') == [
+            ' '.join(ROUTE_COLOURS[symbols[c]] for c in row) for row in expected.values.tolist()
+        ]
@@ -1,6 +1,45 @@
+import io
 import pytest
 import os
-from advent_of_code.day_4 import passport_validator, read_passport_data
+from advent_of_code.day_4 import (passport_validator, read_passport_data, compile_validation_plan,
+                                  validate_passport, check_height, check_hair, iter_passport_data,
+                                  passport_columns, evaluate_passport_columns,
+                                  validate_passport_file_parallel, AdaptiveValidator,
+                                  PassportStore)
+
+
+# Legacy rule lambdas, kept independent of PASSPORT_SCHEMA as an oracle for the compiled plan
+LEGACY_RULES = {
+    'byr' : {
+        'name': "Birth Year",
+        'rule': lambda x: int(x) >= 1920 and int(x) <= 2002
+    },
+    'iyr' : {
+        'name': "Issue Year",
+        'rule': lambda x: int(x) >= 2010 and int(x) <= 2020
+    },
+    'eyr' : {
+        'name': "Expiration Year",
+        'rule': lambda x: int(x) >= 2020 and int(x) <= 2030
+    },
+    'hgt' : {
+        'name': "Height",
+        'rule': lambda x: check_height(x, (150, 193), (59, 76))
+    },
+    'hcl' : {
+        'name': "Hair Color",
+        'rule': lambda x: check_hair(x)
+    },
+    'ecl' : {
+        'name': "Eye Color",
+        'rule': lambda x: x in ['amb', 'blu', 'brn', 'gry',
+                                'grn', 'hzl', 'oth']
+    },
+    'pid' : {
+        'name': "Passport ID",
+        'rule': lambda x: x.isdigit() and len(x) == 9
+    }
+}
 
 
 @pytest.mark.day4
@@ -15,3 +54,139 @@ def test_validator():
     _n_valid = sum(_validator(i) for i in _data)
 
     assert _n_valid == 2
+
+
+@pytest.mark.day4
+def test_compiled_plan_matches_validator():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_4', 'data.txt')
+    plan = compile_validation_plan()
+    data = read_passport_data(DATA_FILE)
+    for passport in data:
+        assert validate_passport(passport, plan) == passport_validator(passport, LEGACY_RULES)
+
+    assert validate_passport({'byr': '2002', 'iyr': '2015', 'eyr': '2025', 'hgt': '60in',
+                              'hcl': '#123abc', 'ecl': 'brn', 'pid': '000000001'}, plan)
+
+    base = {'byr': '2002', 'iyr': '2015', 'eyr': '2025', 'hgt': '60in',
+            'hcl': '#123abc', 'ecl': 'brn', 'pid': '000000001'}
+    for height in ['170cmx', 'a170cm', '60in170cm', '170in60cm', '170', '170CM', '59in', '194cm']:
+        passport = dict(base, hgt=height)
+        assert validate_passport(passport, plan) == passport_validator(passport, LEGACY_RULES), height
+    assert not validate_passport({'byr': '2003', 'iyr': '2015', 'eyr': '2025', 'hgt': '60in',
+                                  'hcl': '#123abc', 'ecl': 'brn', 'pid': '000000001'}, plan)
+
+
+@pytest.mark.day4
+@pytest.mark.parametrize('buffer_size', [1, 5, 4096])
+def test_streaming_reader_keeps_final_record(buffer_size):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_4.dat')
+    with open(DATA_FILE) as f:
+        passports = list(iter_passport_data(f, buffer_size))
+    assert len(passports) == 4
+    assert passports[-1]['hgt'] == '59in'
+    assert passports == read_passport_data(DATA_FILE)
+
+    raw = io.StringIO('a:1 b:2\n\n \n\nc:3\nd:#4')
+    assert list(iter_passport_data(raw, buffer_size)) == [{'a': '1', 'b': '2'}, {'c': '3', 'd': '#4'}]
+
+
+@pytest.mark.day4
+def test_columnar_validation_matches_plan():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_4', 'data.txt')
+    plan = compile_validation_plan()
+    data = read_passport_data(DATA_FILE) + [
+        {'byr': '2002', 'iyr': '2015', 'eyr': '2025', 'hgt': '60IN',
+         'hcl': '#123ABC', 'ecl': 'brn', 'pid': '000000001'},
+        {'byr': '02002', 'iyr': '2015', 'eyr': '2025', 'hgt': '150cm',
+         'hcl': '#123abc', 'ecl': 'brn', 'pid': '000000001'},
+        {'byr': '1920', 'iyr': '2015', 'eyr': '2025', 'hgt': '150in',
+         'hcl': '#123abc', 'ecl': 'brn', 'pid': '0000000012'},
+        {}
+    ] + [
+        {'byr': '2002', 'iyr': '2015', 'eyr': '2025', 'hgt': height,
+         'hcl': '#123abc', 'ecl': 'brn', 'pid': '000000001'}
+        for height in ['170cmx', 'a170cm', '60in170cm', '170in60cm', '170', '194cm']
+    ]
+    results = evaluate_passport_columns(passport_columns(data))
+    assert list(results.columns) == ['byr', 'iyr', 'eyr', 'hgt', 'hcl', 'ecl', 'pid']
+    assert results.all(axis=1).tolist() == [validate_passport(p, plan) for p in data]
+
+
+@pytest.mark.day4
+@pytest.mark.parametrize('chunk_size', [1, 100, 1024**2])
+def test_parallel_validation(chunk_size):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_4', 'data.txt')
+    plan = compile_validation_plan()
+    data = read_passport_data(DATA_FILE)
+    results = validate_passport_file_parallel(DATA_FILE, n_workers=2, chunk_size=chunk_size)
+    assert results['total'] == len(data)
+    assert results['valid'] == sum(validate_passport(p, plan) for p in data)
+    assert results['field_failures'] == {
+        field: sum(field not in p or not check(p[field]) for p in data) for field, check in plan
+    }
+
+
+@pytest.mark.day4
+def test_adaptive_validator_reorders_rules():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_4', 'data.txt')
+    plan = compile_validation_plan()
+    data = read_passport_data(DATA_FILE)
+    validator = AdaptiveValidator(reorder_every=50, time_every=1)
+    assert [validator(p) for p in data] == [validate_passport(p, plan) for p in data]
+
+    failures = {f: s['missing'] + s['invalid'] for f, s in validator.stats.items()}
+    assert sum(failures.values()) == len(data) - sum(validate_passport(p, plan) for p in data)
+    assert sorted(f for f, _ in validator.plan) == sorted(f for f, _ in plan)
+    assert 'Passport ID' in validator.report()
+
+    always_missing = AdaptiveValidator(reorder_every=10)
+    for _ in range(20):
+        always_missing({'byr': '1980', 'iyr': '2015', 'eyr': '2025', 'hgt': '170cm',
+                        'hcl': '#123abc', 'ecl': 'brn'})
+    assert always_missing.plan[0][0] == 'pid'
+
+
+@pytest.mark.day4
+def test_passport_store_lookup():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_4.dat')
+    store = PassportStore.from_file(DATA_FILE, index_fields=('pid', 'ecl'))
+    assert len(store) == 4
+
+    [(passport, valid)] = store.lookup('860033327')
+    assert passport['hgt'] == '183cm' and valid
+    [(passport, valid)] = store.lookup('028048884')
+    assert passport['hcl'] == '#cfa07d' and not valid
+    assert store.lookup('000000000') == []
+    assert len(store.lookup('brn', field='ecl')) == 2
+
+    with pytest.raises(KeyError):
+        store.lookup('2020', field='eyr')
+
+
+@pytest.mark.day4
+def test_adaptive_validator_untimed_rules_not_promoted():
+    validator = AdaptiveValidator(reorder_every=20, time_every=2)
+    for _ in range(20):
+        assert not validator({'byr': '1980', 'iyr': '1900'})
+    assert validator.plan[0][0] == 'iyr'
+    assert validator.stats['iyr']['invalid'] == 20 and validator.stats['eyr']['checked'] == 0
+
+
+@pytest.mark.day4
+def test_adaptive_validator_reorder_reduces_checks():
+    plan = compile_validation_plan()
+    validator = AdaptiveValidator(reorder_every=10**6, time_every=1)
+    no_pid = {'byr': '1980', 'iyr': '2015', 'eyr': '2025', 'hgt': '170cm', 'hcl': '#123abc', 'ecl': 'brn'}
+
+    for _ in range(100):
+        assert validator(no_pid) == validate_passport(no_pid, plan)
+    assert all(validator.stats[f]['checked'] == 100 for f, _ in plan)
+
+    validator.reorder()
+    assert validator.plan[0][0] == 'pid'
+
+    before = {f: s['checked'] for f, s in validator.stats.items()}
+    for _ in range(100):
+        assert validator(no_pid) == validate_passport(no_pid, plan)
+    assert validator.stats['pid']['checked'] == before['pid'] + 100
+    assert all(validator.stats[f]['checked'] == before[f] for f, _ in plan if f != 'pid')
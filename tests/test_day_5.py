@@ -1,5 +1,9 @@
+import os
 import pytest
-from advent_of_code.day_5 import process_seat_code
+from advent_of_code.day_5 import (process_seat_code, binary_search, decode_seat_ids, get_seat_id,
+                                  get_allocations_as_dict, get_highest_booked_seat_id, find_unallocated_seat,
+                                  seat_occupancy, get_occupancy_from_file, get_highest_occupied_seat_id,
+                                  get_free_seat_ids, BookingIndex)
 
 
 @pytest.mark.day5
@@ -16,3 +20,101 @@ def test_seat_binary_search():
         assert process_seat_code(example['alloc']) == example['loc'], \
             f"Test failed on example: {example}"
         print("SUCCESS!")
+
+
+
+@pytest.mark.day5
+def test_bulk_seat_decoder(tmp_path):
+    codes = ['FBFBBFFRLR', 'BFFFBBFRRR', 'FFFBBBFRRR', 'BBFFBBFRLL']
+    data_file = tmp_path / 'day_5.dat'
+    data_file.write_text('\n'.join(codes) + '\n')
+    assert decode_seat_ids(str(data_file)).tolist() == [357, 567, 119, 820]
+
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_5', 'data.txt')
+    expected = [get_seat_id(*process_seat_code(i)) for i in open(DATA_FILE).readlines()]
+    assert decode_seat_ids(DATA_FILE).tolist() == expected
+
+
+@pytest.mark.day5
+@pytest.mark.parametrize('terminator', ['\n', '\r\n'])
+@pytest.mark.parametrize('trailing', [True, False])
+def test_bulk_seat_decoder_line_endings(tmp_path, terminator, trailing):
+    codes = ['FBFBBFFRLR', 'BFFFBBFRRR', 'FFFBBBFRRR', 'BBFFBBFRLL']
+    data_file = tmp_path / 'day_5.dat'
+    data_file.write_bytes((terminator.join(codes) + (terminator if trailing else '')).encode())
+    assert decode_seat_ids(str(data_file)).tolist() == [357, 567, 119, 820]
+    assert decode_seat_ids(str(data_file), 10).tolist() == [357, 567, 119, 820]
+
+
+@pytest.mark.day5
+@pytest.mark.parametrize('content', [b'FBFBBFFRLR\nBFFFBBFRR\nFFFBBBFRRRR\n',
+                                     b'FBFBBFFRLR\nBFFFBBFRRR\n\n',
+                                     b'FBFBBFFRLR\r\nBFFFBBFRRR\n',
+                                     b'\nFBFBBFFRLR\n'])
+def test_bulk_seat_decoder_ragged(tmp_path, content):
+    data_file = tmp_path / 'day_5.dat'
+    data_file.write_bytes(content)
+    with pytest.raises(AssertionError):
+        decode_seat_ids(str(data_file))
+    with pytest.raises(AssertionError):
+        decode_seat_ids(str(data_file), 10)
+
+
+@pytest.mark.day5
+def test_binary_search_without_halving():
+    assert binary_search('FBFBBFF', 'F') == 44
+    assert binary_search(list('RLR'), 'L') == 5
+    assert binary_search('', 'F') == 0
+
+
+@pytest.mark.day5
+def test_occupancy_bitmap_queries():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_5', 'data.txt')
+    bookings = get_allocations_as_dict(DATA_FILE)
+    occupancy = get_occupancy_from_file(DATA_FILE)
+    assert get_highest_occupied_seat_id(occupancy) == get_highest_booked_seat_id(bookings)
+    assert get_free_seat_ids(occupancy, between_booked=True).tolist() == [find_unallocated_seat(bookings, 8)]
+
+    occupancy = seat_occupancy([0, 1, 3, 4, 5, 7, 2**12 - 2], n_row_bits=8, n_col_bits=4)
+    assert occupancy.size == 2**12
+    assert get_highest_occupied_seat_id(occupancy) == 2**12 - 2
+    assert get_free_seat_ids(occupancy)[:3].tolist() == [2, 6, 8]
+    assert get_free_seat_ids(occupancy, between_booked=True).tolist() == [2, 6]
+
+    with pytest.raises(ValueError):
+        seat_occupancy([2**10])
+
+
+@pytest.mark.day5
+def test_incremental_booking_index():
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_5', 'data.txt')
+    index = BookingIndex.from_file(DATA_FILE)
+    occupancy = get_occupancy_from_file(DATA_FILE)
+    assert index.get_highest_booked_seat_id() == get_highest_occupied_seat_id(occupancy)
+    assert index.get_lowest_free_seat_id() == get_free_seat_ids(occupancy)[0]
+    assert index.get_free_seats_between_booked() == get_free_seat_ids(occupancy, True).tolist()
+
+    index = BookingIndex(n_row_bits=2, n_col_bits=1)
+    for seat in (0, 2, 4, 7):
+        index.book(seat)
+    assert index.get_highest_booked_seat_id() == 7
+    assert index.get_lowest_free_seat_id() == 1
+    assert index.get_free_seats_between_booked() == [1, 3]
+    index.cancel(7)
+    index.book(1)
+    assert index.get_highest_booked_seat_id() == 4
+    assert index.get_lowest_free_seat_id() == 3
+    assert index.get_free_seats_between_booked() == [3]
+    assert (index.n_booked, index.n_free) == (4, 4)
+
+    with pytest.raises(ValueError):
+        index.book(1)
+    with pytest.raises(ValueError):
+        index.cancel(7)
+
+    index = BookingIndex(n_row_bits=2, n_col_bits=1)
+    index.book(6)
+    assert not index.is_booked(5) and index.is_booked(6)
+    for seat in (-1, 8):
+        with pytest.raises(ValueError):
+            index.is_booked(seat)
@@ -1,6 +1,10 @@
+import io
 import pytest
 import os
-from advent_of_code.day_6 import get_totals_from_lines
+from advent_of_code.day_6 import (get_totals_from_lines, answer_mask, popcount,
+                                  num_yes_questions_for_group_or, num_yes_questions_for_group_and,
+                                  iter_groups, get_totals_from_groups, get_total_for_flight,
+                                  get_total_for_flight_parallel)
 
 
 @pytest.fixture
@@ -21,3 +25,41 @@ def test_total_yes_or(day_6_totals):
 @pytest.mark.day6
 def test_total_yes_and(day_6_totals):
     assert day_6_totals[1] == 6
+
+
+@pytest.mark.day6
+def test_answer_masks():
+    assert answer_mask('abz') == 1 | 2 | 1 << 25
+    assert popcount(answer_mask('abcx\n')) == 4
+    assert num_yes_questions_for_group_or('abcabd') == 4
+    assert num_yes_questions_for_group_and(['abc', 'cab', 'bx']) == 1
+    assert num_yes_questions_for_group_and([]) == 0
+    assert get_totals_from_lines(iter(['\n', 'ab\n', 'b\n', '\n', '\n', 'xyz'])) == (5, 4)
+
+
+@pytest.mark.day6
+@pytest.mark.parametrize('buffer_size', [1, 4, 4096])
+def test_streaming_groups(buffer_size):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), 'day_6.dat')
+    with open(DATA_FILE) as f:
+        groups = list(iter_groups(f, buffer_size))
+    assert groups == [['abc'], ['a', 'b', 'c'], ['ab', 'ac'], ['a', 'a', 'a', 'a'], ['b']]
+    assert get_totals_from_groups(groups) == (11, 6)
+    assert get_total_for_flight(DATA_FILE) == (11, 6)
+
+
+@pytest.mark.day6
+@pytest.mark.parametrize('chunk_size', [1, 10, 1024**2])
+def test_parallel_flight_totals(chunk_size):
+    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'advent_of_code', 'day_6', 'data.txt')
+    expected = get_totals_from_lines(open(DATA_FILE).readlines())
+    assert get_total_for_flight_parallel(DATA_FILE, n_workers=2, chunk_size=chunk_size) == expected
+
+
+@pytest.mark.day6
+def test_groups_split_across_buffers():
+    raw = '\n\nab\nb\n \n\nc\nca\n\n\nxyz'
+    for buffer_size in range(1, len(raw) + 1):
+        groups = list(iter_groups(io.StringIO(raw), buffer_size))
+        assert groups == [['ab', 'b'], ['c', 'ca'], ['xyz']]
+    assert get_totals_from_groups(groups) == get_totals_from_lines(raw.split('\n')) == (7, 5)